@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Helpers shared by the benchmarks
+
+@author:
+@version: 2025.12
+"""
+
+import datetime
+import json
+import pathlib
+import socket
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentiles(timings: list[float]) -> dict:
+    """Get the `PERCENTILES` of some timings, 0 for no timings
+
+    :param timings: measured timings in any order
+    """
+    timings = sorted(timings)
+    return {
+        f"p{percentile}": timings[min(len(timings) - 1, len(timings) * percentile // 100)] if timings else 0.0
+        for percentile in PERCENTILES
+    }
+
+
+def percentile_columns(unit: str) -> str:
+    """Header of the percentile columns of a results table
+
+    :param unit: unit of the timings, e.g. ms
+    """
+    return "".join(f"{f'p{percentile} {unit}':>10}" for percentile in PERCENTILES)
+
+
+def write_report(path: pathlib.Path, parameters: dict, results, **extra) -> None:
+    """Save the results of a benchmark run as JSON
+
+    :param path: file to write
+    :param parameters: parameters of the run
+    :param results: measured results
+    :param extra: other top-level fields, e.g. the platform
+    """
+    report = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        **extra,
+        "parameters": parameters,
+        "results": results,
+    }
+    path.write_text(json.dumps(report, indent=2))
+
+
+def free_port() -> int:
+    """Find a local port that nothing listens on"""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Benchmark complete PandAuth logins against the local stand-in provider
+
+The stand-in provider runs in a separate process and PandAuth is pointed at it with `GOOGLE_CONFIG`.
+Concurrent browsers go through the whole flow, each time as a new user:
+`auth.login` redirects to the provider, the provider redirects back to `auth.callback`
+with a code, and `main.index` shows the logged-in user.
+Logins per second and latency percentiles of every step and of every call PandAuth makes to the provider
+are printed and, with `--output`, saved as JSON.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+import requests
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import free_port, percentiles, write_report  # noqa: E402
+from exercises.authorization.mock_provider import serve  # noqa: E402
+from exercises.authorization.panda import create_app, db, http  # noqa: E402
+
+STEPS = ("login", "authorize", "callback", "index")
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1).raise_for_status()
+            return
+        except requests.RequestException:
+            time.sleep(0.1)
+    raise TimeoutError(f"Provider at {url} did not start")
+
+
+def run(base: str, browsers: int, logins: int) -> dict:
+    """Log new users in from several threads at once
+
+    :param base: PandAuth URL
+    :param browsers: number of threads
+    :param logins: number of logins per thread
+    """
+    steps: dict[str, list[float]] = {step: [] for step in STEPS}
+    calls: dict[str, list[float]] = {}
+    flows: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def record_call(response, *args, **kwargs):
+        # Time until the provider answered, as seen by PandAuth
+        with lock:
+            calls.setdefault(urlsplit(response.url).path, []).append(response.elapsed.total_seconds() * 1000)
+
+    def browser(idx: int) -> None:
+        nonlocal errors
+        timings: dict[str, list[float]] = {step: [] for step in STEPS}
+        totals, failed = [], 0
+        for login in range(logins):
+            user = f"bench-{browsers}-{idx}-{login}"
+            with requests.Session() as session:
+                start = time.perf_counter()
+                try:
+                    location = base + "/auth/login"
+                    for step in STEPS:
+                        if step == "authorize":
+                            location += f"&login_hint={user}"
+                        if step == "callback":
+                            # PandAuth asks for an HTTPS callback, which the benchmark server does not speak
+                            location = location.replace("https://", "http://", 1)
+                        step_start = time.perf_counter()
+                        response = session.get(location, allow_redirects=False, timeout=30)
+                        timings[step].append((time.perf_counter() - step_start) * 1000)
+                        location = urljoin(response.url, response.headers.get("Location", ""))
+                    if f"{user}@example.com" not in response.text:
+                        failed += 1
+                except requests.RequestException:
+                    failed += 1
+                totals.append((time.perf_counter() - start) * 1000)
+        with lock:
+            for step in STEPS:
+                steps[step].extend(timings[step])
+            flows.extend(totals)
+            errors += failed
+
+    http.hooks["response"].append(record_call)
+    threads = [threading.Thread(target=browser, args=(idx,)) for idx in range(browsers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    http.hooks["response"].remove(record_call)
+    return {
+        "browsers": browsers,
+        "logins": len(flows),
+        "errors": errors,
+        "seconds": elapsed,
+        "logins_per_second": len(flows) / elapsed,
+        "flow_ms": percentiles(flows),
+        "steps_ms": {step: percentiles(timings) for step, timings in steps.items()},
+        "provider_calls": {
+            path: {"count": len(timings), **percentiles(timings)} for path, timings in sorted(calls.items())
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-c", "--browsers", nargs="+", type=int, default=[1, 4, 16], help="concurrent browsers")
+    parser.add_argument("-n", "--logins", type=int, default=50, help="logins per browser")
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    port = free_port()
+    script = pathlib.Path(__file__).parents[2] / "exercises/authorization/mock_provider.py"
+    provider = subprocess.Popen([sys.executable, script, "--port", str(port)], stdout=subprocess.DEVNULL)
+    discovery_url = f"http://127.0.0.1:{port}/.well-known/openid-configuration"
+    results = []
+    try:
+        wait_until_ready(discovery_url)
+        os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
+        with tempfile.TemporaryDirectory() as scratch:
+            app = create_app(
+                {
+                    "GOOGLE_CLIENT_ID": "panda",
+                    "GOOGLE_CLIENT_SECRET": "secret",
+                    "GOOGLE_CONFIG": discovery_url,
+                    "DISCOVERY_CACHE": pathlib.Path(scratch) / "discovery.json",
+                    "DATABASE": pathlib.Path(scratch) / "users.db",
+                }
+            )
+            # Discover the provider up front instead of in the background, so that no login waits for it
+            if not app.config["discovery"].refresh():
+                raise RuntimeError(f"Cannot discover the provider at {discovery_url}")
+            with serve(app) as base:
+                for browsers in args.browsers:
+                    result = run(base, browsers, args.logins)
+                    results.append(result)
+                    print(
+                        f"{browsers} browsers: {result['logins_per_second']:.1f} logins/s, {result['errors']} errors, "
+                        + ", ".join(f"{name} {value:.2f} ms" for name, value in result["flow_ms"].items())
+                    )
+                    for name, timings in [*result["steps_ms"].items(), *result["provider_calls"].items()]:
+                        print(f"  {name:<12}" + "".join(f"{f'{key} {round(value, 2)}':>14}" for key, value in timings.items()))
+            app.config["audit"].close()
+            with app.app_context():
+                db.engine.dispose()
+    finally:
+        provider.terminate()
+        provider.wait()
+    if args.output:
+        write_report(args.output, {"logins": args.logins, "browsers": args.browsers}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Benchmark PandAuth user writes on login
+
+Concurrent writers log users in against a scratch copy of the database,
+half of them for the first time and half of them again,
+using either the single-statement upsert or the former select-then-insert.
+Logins per second, latency percentiles, and failed logins are printed and,
+with `--output`, saved as JSON.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import datetime
+import pathlib
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import SQLAlchemyError
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import percentile_columns, percentiles, write_report  # noqa: E402
+from exercises.authorization.panda import create_app, db  # noqa: E402
+from exercises.authorization.panda.models import User, upsert_user  # noqa: E402
+
+
+def select_then_insert(id: str, email: str, name: str, picture: str) -> None:
+    """Login as it was written before the upsert"""
+    user = db.session.query(User).filter_by(id=id).first()
+    if not user:
+        user = User(id=id, email=email, name=name, picture=picture, registered=datetime.datetime.now())
+        db.session.add(user)
+        db.session.commit()
+
+
+STRATEGIES = {"upsert": upsert_user, "select-insert": select_then_insert}
+
+
+def run(app, strategy: str, writers: int, logins: int, seed: int) -> dict:
+    """Log users in from several threads at once
+
+    :param app: app to log in to
+    :param strategy: upsert|select-insert
+    :param writers: number of threads
+    :param logins: number of logins per thread
+    :param seed: random seed
+    """
+    rng = random.Random(seed)
+    users = [f"{strategy}-{writers}-{idx}" for idx in range(writers * logins // 2)]
+    sequence = users + rng.choices(users, k=writers * logins - len(users))
+    rng.shuffle(sequence)
+    login = STRATEGIES[strategy]
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def writer(batch: list[str]) -> None:
+        nonlocal errors
+        timings, failed = [], 0
+        with app.app_context():
+            for user in batch:
+                start = time.perf_counter()
+                try:
+                    login(user, f"{user}@example.com", "Panda", None)
+                except SQLAlchemyError:
+                    db.session.rollback()
+                    failed += 1
+                timings.append((time.perf_counter() - start) * 1000)
+            db.session.remove()
+        with lock:
+            latencies.extend(timings)
+            errors += failed
+
+    threads = [threading.Thread(target=writer, args=(sequence[idx::writers],)) for idx in range(writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "strategy": strategy,
+        "writers": writers,
+        "logins": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "logins_per_second": len(latencies) / elapsed,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--strategies", nargs="+", choices=STRATEGIES, default=list(STRATEGIES))
+    parser.add_argument("-w", "--writers", nargs="+", type=int, default=[1, 4, 16], help="concurrent writers")
+    parser.add_argument("-n", "--logins", type=int, default=200, help="logins per writer")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'strategy':<15}{'writers':>8}{'logins/s':>10}{'errors':>8}" + percentile_columns("ms"))
+    with tempfile.TemporaryDirectory() as scratch:
+        app = create_app(
+            {
+                "GOOGLE_CLIENT_ID": "panda",
+                "GOOGLE_CONFIG": {},
+                "DATABASE": pathlib.Path(scratch) / "users.db",
+            }
+        )
+        for strategy in args.strategies:
+            for writers in args.writers:
+                result = run(app, strategy, writers, args.logins, args.seed)
+                results.append(result)
+                print(
+                    f"{strategy:<15}{writers:>8}{result['logins_per_second']:>10.1f}{result['errors']:>8}"
+                    + "".join(f"{value:>10.2f}" for value in result["latency_ms"].values())
+                )
+        with app.app_context():
+            db.engine.dispose()
+    if args.output:
+        write_report(args.output, {"logins": args.logins, "writers": args.writers, "seed": args.seed}, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark the overhead of PandAuth login rate limiting
+
+Concurrent threads check the limit of randomly chosen clients with the memory and the SQLite backends,
+with more clients than the memory backend keeps when `--keys` exceeds `--size`.
+The cost of a whole request is measured too, as the difference between back-to-back requests
+to a view with and without the decorator, so that it is a distribution of per-request differences.
+Checks per second and latency percentiles are printed and, with `--output`, saved as JSON.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import pathlib
+import random
+import sys
+import tempfile
+import threading
+import time
+
+from flask import Flask
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import percentile_columns, percentiles, write_report  # noqa: E402
+from exercises.authorization.panda.ratelimit import (  # noqa: E402
+    MemoryBuckets,
+    RateLimiter,
+    SQLiteBuckets,
+    rate_limited,
+)
+
+BACKENDS = ("memory", "sqlite")
+
+
+def run(limiter: RateLimiter, threads: int, checks: int, keys: int, seed: int) -> dict:
+    """Check limits from several threads at once
+
+    :param limiter: limiter to check
+    :param threads: number of threads
+    :param checks: number of checks per thread
+    :param keys: number of distinct clients
+    :param seed: random seed
+    """
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def checker(idx: int) -> None:
+        rng = random.Random(seed + idx)
+        clients = [f"10.{key // 65536}.{key // 256 % 256}.{key % 256}" for key in rng.choices(range(keys), k=checks)]
+        timings = []
+        for client in clients:
+            start = time.perf_counter()
+            limiter.hit("ip", client)
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        with lock:
+            latencies.extend(timings)
+
+    workers = [threading.Thread(target=checker, args=(idx,)) for idx in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "threads": threads,
+        "checks": len(latencies),
+        "seconds": elapsed,
+        "checks_per_second": len(latencies) / elapsed,
+        "latency_us": percentiles(latencies),
+    }
+
+
+def request_overhead(limiter: RateLimiter, requests: int) -> dict:
+    """Time pairs of requests to a view with and without the decorator from the same client"""
+    app = Flask(__name__)
+    app.config["rate_limiter"] = limiter
+
+    @app.get("/plain")
+    def plain():
+        return ""
+
+    @app.get("/limited")
+    @rate_limited("ip")
+    def limited():
+        return ""
+
+    client = app.test_client()
+    timings: dict[str, list[float]] = {"plain": [], "limited": []}
+    for idx in range(requests):
+        address = f"10.1.{idx // 256 % 256}.{idx % 256}"
+        # Alternate which view goes first, so that warm caches favor neither
+        for path in ("plain", "limited") if idx % 2 else ("limited", "plain"):
+            start = time.perf_counter()
+            client.get(f"/{path}", environ_base={"REMOTE_ADDR": address})
+            timings[path].append((time.perf_counter() - start) * 1_000_000)
+    return {
+        "plain_us": percentiles(timings["plain"]),
+        "limited_us": percentiles(timings["limited"]),
+        "overhead_us": percentiles([limited - plain for plain, limited in zip(timings["plain"], timings["limited"])]),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("-t", "--threads", nargs="+", type=int, default=[1, 4, 16], help="concurrent threads")
+    parser.add_argument("-n", "--checks", type=int, default=5000, help="checks per thread")
+    parser.add_argument("-k", "--keys", type=int, default=200_000, help="distinct clients")
+    parser.add_argument("--size", type=int, default=100_000, help="clients kept by the memory backend")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'backend':<10}{'threads':>8}{'checks/s':>12}" + percentile_columns("us"))
+    with tempfile.TemporaryDirectory() as scratch:
+        for backend in args.backends:
+            if backend == "memory":
+                buckets = MemoryBuckets(args.size)
+            else:
+                buckets = SQLiteBuckets(pathlib.Path(scratch) / "ratelimit.db")
+            limiter = RateLimiter(buckets, {"ip": (0.5, 20)})
+            for threads in args.threads:
+                result = {"backend": backend, **run(limiter, threads, args.checks, args.keys, args.seed)}
+                results.append(result)
+                print(
+                    f"{backend:<10}{threads:>8}{result['checks_per_second']:>12.0f}"
+                    + "".join(f"{value:>10.1f}" for value in result["latency_us"].values())
+                )
+            overhead = request_overhead(limiter, args.checks)
+            results.append({"backend": backend, "request": overhead})
+            print(
+                f"{backend:<10}{'request':>8}{'overhead':>12}"
+                + "".join(f"{value:>10.1f}" for value in overhead["overhead_us"].values())
+            )
+    if args.output:
+        write_report(
+            args.output,
+            {
+                "threads": args.threads,
+                "checks": args.checks,
+                "keys": args.keys,
+                "size": args.size,
+                "seed": args.seed,
+            },
+            results,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark PandAuth session backends
+
+Concurrent clients, each logged in as its own user, request the home page
+with the signed-cookie session or with the memory or SQLite server-side session.
+Requests per second, latency percentiles, and the size of the session cookie are printed and,
+with `--output`, saved as JSON.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import pathlib
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import percentile_columns, percentiles, write_report  # noqa: E402
+from exercises.authorization.panda import create_app, db  # noqa: E402
+from exercises.authorization.panda.models import upsert_user  # noqa: E402
+
+BACKENDS = ("cookie", "memory", "sqlite")
+
+
+def run(app, backend: str, clients: int, requests: int) -> dict:
+    """Request the home page from several threads at once
+
+    :param app: app to request pages from
+    :param backend: cookie|memory|sqlite
+    :param clients: number of threads, each with its own user and session
+    :param requests: number of requests per thread
+    """
+    browsers = []
+    with app.app_context():
+        for idx in range(clients):
+            user = upsert_user(f"{backend}-{idx}", f"{backend}-{idx}@example.com", "Panda", None)
+            browser = app.test_client()
+            with browser.session_transaction() as session:
+                session["_user_id"] = user.id
+                session["_fresh"] = True
+            browsers.append(browser)
+        db.session.remove()
+    cookie_bytes = len(browsers[0].get_cookie("session").value)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client(browser) -> None:
+        nonlocal errors
+        timings, failed = [], 0
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = browser.get("/")
+            if response.status_code != 200 or b"example.com" not in response.data:
+                failed += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(timings)
+            errors += failed
+
+    threads = [threading.Thread(target=client, args=(browser,)) for browser in browsers]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "backend": backend,
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "cookie_bytes": cookie_bytes,
+        "seconds": elapsed,
+        "requests_per_second": len(latencies) / elapsed,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("-c", "--clients", nargs="+", type=int, default=[1, 4, 16], help="concurrent clients")
+    parser.add_argument("-n", "--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'backend':<10}{'clients':>8}{'req/s':>10}{'errors':>8}{'cookie':>8}"
+        + percentile_columns("ms")
+    )
+    with tempfile.TemporaryDirectory() as scratch:
+        for backend in args.backends:
+            app = create_app(
+                {
+                    "GOOGLE_CLIENT_ID": "panda",
+                    "GOOGLE_CONFIG": {},
+                    "DATABASE": pathlib.Path(scratch) / "users.db",
+                    "SESSION_BACKEND": backend,
+                }
+            )
+            for clients in args.clients:
+                result = run(app, backend, clients, args.requests)
+                results.append(result)
+                print(
+                    f"{backend:<10}{clients:>8}{result['requests_per_second']:>10.1f}{result['errors']:>8}"
+                    f"{result['cookie_bytes']:>8}"
+                    + "".join(f"{value:>10.2f}" for value in result["latency_ms"].values())
+                )
+            with app.app_context():
+                db.engine.dispose()
+    if args.output:
+        write_report(args.output, {"requests": args.requests, "clients": args.clients}, results)
+
+
+if __name__ == "__main__":
+    main()
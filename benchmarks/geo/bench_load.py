@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Benchmark `geo` under concurrent load
+
+For every retrieval mode, a local server is started in a separate process
+with the full-page response cache disabled, and a realistic URL mix is requested
+at several concurrency levels: the world page, every region, every subregion,
+and countries sampled with a Zipf distribution over their population rank.
+Throughput and latency percentiles are printed and, with `--output`, saved as JSON.
+The same `--seed` always produces the same URL sequence.
+
+@author:
+@version: 2025.11
+"""
+
+import argparse
+import http.client
+import os
+import pathlib
+import platform
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import free_port, percentile_columns, percentiles, write_report  # noqa: E402
+from exercises.geo.alex import create_app  # noqa: E402
+from exercises.geo.alex.pool import RETRIEVAL_MODES  # noqa: E402
+
+
+def url_mix(requests: int, zipf: float, page_share: float, seed: int) -> list[str]:
+    """Build a reproducible sequence of URLs
+
+    :param requests: number of URLs
+    :param zipf: exponent of the Zipf distribution of country popularity
+    :param page_share: share of requests for the world, region, and subregion pages
+    :param seed: random seed
+    """
+    app = create_app()
+    countries = [name for name, _ in app.config["country_columns"].top("population_2023", 1_000)]
+    countries += sorted(set(app.config["countries"]) - set(countries))
+    pages = ["/"]
+    pages += [f"/region/{quote(region)}" for region in app.config["regions"]]
+    pages += [f"/subregion/{quote(subregion)}" for subregion in app.config["subregions"]]
+    popularity = [1 / rank**zipf for rank in range(1, len(countries) + 1)]
+    total = sum(popularity)
+    weights = [page_share / len(pages)] * len(pages)
+    weights += [(1 - page_share) * weight / total for weight in popularity]
+    urls = pages + [f"/country/{quote(country)}" for country in countries]
+    return random.Random(seed).choices(urls, weights, k=requests)
+
+
+def serve(mode: str, port: int) -> None:
+    """Run the app in a threaded server until killed"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    os.environ["FLASK_RETRIEVAL_MODE"] = mode
+    os.environ["FLASK_RESPONSE_CACHE_SIZE"] = "0"
+    WSGIRequestHandler.protocol_version = "HTTP/1.1"
+    WSGIRequestHandler.log_request = lambda *args, **kwargs: None
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+
+def wait_until_ready(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            connection.request("GET", "/region")
+            connection.getresponse().read()
+            connection.close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def run(port: int, urls: list[str], concurrency: int) -> dict:
+    """Request all URLs using a number of keep-alive clients in parallel
+
+    :param port: server port
+    :param urls: URLs to request, each once
+    :param concurrency: number of parallel clients
+    """
+    pending: queue.SimpleQueue[str] = queue.SimpleQueue()
+    for url in urls:
+        pending.put(url)
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def client() -> None:
+        nonlocal errors
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        timings, failed = [], 0
+        while True:
+            try:
+                url = pending.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            try:
+                connection.request("GET", url)
+                response = connection.getresponse()
+                response.read()
+                failed += response.status >= 400
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                failed += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        connection.close()
+        with lock:
+            latencies.extend(timings)
+            errors += failed
+
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": elapsed,
+        "throughput": len(latencies) / elapsed,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def benchmark(mode: str, urls: list[str], levels: list[int]) -> list[dict]:
+    """Start a server in a retrieval mode, warm it up, and load it at every concurrency level"""
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, __file__, "--serve", mode, "--port", str(port)], stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_until_ready(port)
+        run(port, sorted(set(urls)), max(levels))
+        return [run(port, urls, level) for level in levels]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=RETRIEVAL_MODES, default=list(RETRIEVAL_MODES))
+    parser.add_argument("-c", "--concurrency", nargs="+", type=int, default=[1, 4, 16], help="parallel clients")
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--zipf", type=float, default=1.0, help="Zipf exponent of country popularity")
+    parser.add_argument("--page-share", type=float, default=0.3, help="share of world and region pages")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    parser.add_argument("--serve", choices=RETRIEVAL_MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    urls = url_mix(args.requests, args.zipf, args.page_share, args.seed)
+    results = {}
+    print(f"{'mode':<10}{'clients':>8}{'req/s':>10}" + percentile_columns("ms"))
+    for mode in args.modes:
+        results[mode] = benchmark(mode, urls, args.concurrency)
+        for run_result in results[mode]:
+            print(
+                f"{mode:<10}{run_result['concurrency']:>8}{run_result['throughput']:>10.1f}"
+                + "".join(f"{value:>10.2f}" for value in run_result["latency_ms"].values())
+            )
+    if args.output:
+        write_report(
+            args.output,
+            {
+                "requests": args.requests,
+                "zipf": args.zipf,
+                "page_share": args.page_share,
+                "seed": args.seed,
+                "concurrency": args.concurrency,
+            },
+            results,
+            python=platform.python_version(),
+            platform=platform.platform(),
+        )
+
+
+if __name__ == "__main__":
+    main()
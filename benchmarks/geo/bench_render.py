@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark `geo` page rendering
+
+Every page is requested once to warm the query cache,
+so the timings are dominated by template rendering.
+The response cache is disabled unless `--cached` is given.
+
+@author:
+@version: 2025.11
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import percentile_columns, percentiles  # noqa: E402
+from exercises.geo.alex import create_app  # noqa: E402
+
+PAGES = [
+    "/",
+    "/region",
+    "/region/Europe",
+    "/subregion",
+    "/subregion/Caribbean",
+    "/country",
+    "/country/Ukraine",
+    "/country/United States",
+    "/region/Eurasia",
+    "/country/Aldovia",
+]
+
+
+def measure(client, page: str, repeat: int) -> list[float]:
+    """Time repeated requests of a single page in milliseconds"""
+    client.get(page)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        client.get(page)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeat", type=int, default=200, help="requests per page")
+    parser.add_argument("--cached", action="store_true", help="keep the full-page response cache on")
+    args = parser.parse_args()
+
+    app = create_app()
+    if not args.cached:
+        app.config["response_cache"].maxsize = 0
+    with app.test_client() as client:
+        print(f"{'page':<28}" + percentile_columns("ms"))
+        for page in PAGES:
+            timings = percentiles(measure(client, page, args.repeat))
+            print(f"{page:<28}" + "".join(f"{value:>10.3f}" for value in timings.values()))
+
+
+if __name__ == "__main__":
+    main()
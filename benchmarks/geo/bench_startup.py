@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Benchmark `geo` app factory
+
+Compares building the lookups from the database with loading them from the snapshot.
+The query cache is cleared before every creation, as in a fresh worker.
+
+@author:
+@version: 2025.11
+"""
+
+import argparse
+import pathlib
+import statistics
+import sys
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from exercises.geo.alex import create_app  # noqa: E402
+from exercises.geo.alex.retrieval import clear_cache  # noqa: E402
+from exercises.geo.alex.snapshot import snapshot_path  # noqa: E402
+
+
+def measure(db_file: pathlib.Path, use_snapshot: bool, repeat: int) -> list[float]:
+    """Time repeated app creations in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        clear_cache()
+        if not use_snapshot:
+            snapshot_path(db_file).unlink(missing_ok=True)
+        app = create_app()
+        timings.append(app.config["STARTUP_MS"])
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--repeat", type=int, default=20, help="app creations per mode")
+    args = parser.parse_args()
+
+    db_file = create_app().config["DB_FILE"]
+    print(f"{'lookups from':<16}{'median ms':>12}{'max ms':>12}")
+    for label, use_snapshot in (("database", False), ("snapshot", True)):
+        timings = measure(db_file, use_snapshot, args.repeat)
+        print(f"{label:<16}{statistics.median(timings):>12.1f}{max(timings):>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark password logins of the security exercise at several hashing costs
+
+For every target hash time, the PBKDF2 rounds are calibrated on this machine, and concurrent clients
+verify a password either on the bounded hashing pool or inline on their own thread.
+Logins per second, latency percentiles, and logins rejected by a full pool are printed and,
+with `--output`, saved as JSON.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import os
+import pathlib
+import sys
+import threading
+import time
+
+sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+from benchmarks._common import percentile_columns, percentiles, write_report  # noqa: E402
+from exercises.security.hashing import HashingBusy, HashingService, calibrate  # noqa: E402
+
+MODES = ("pool", "inline")
+
+
+def run(service: HashingService, mode: str, clients: int, logins: int) -> dict:
+    """Verify a password from several threads at once
+
+    :param service: hashing service with the rounds to test
+    :param mode: pool|inline
+    :param clients: number of threads
+    :param logins: number of logins per thread
+    """
+    stored = service.hash("panda")
+    latencies: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+
+    def client() -> None:
+        nonlocal rejected
+        timings, busy = [], 0
+        for _ in range(logins):
+            start = time.perf_counter()
+            try:
+                if mode == "pool":
+                    service.verify("panda", stored)
+                else:
+                    service.context.verify_and_update("panda", stored)
+            except HashingBusy:
+                busy += 1
+            timings.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(timings)
+            rejected += busy
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "clients": clients,
+        "logins": len(latencies) - rejected,
+        "rejected": rejected,
+        "seconds": elapsed,
+        "logins_per_second": (len(latencies) - rejected) / elapsed,
+        "latency_ms": percentiles(latencies),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-t", "--targets", nargs="+", type=float, default=[25, 50, 100, 250], help="hash time in ms")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("-c", "--clients", nargs="+", type=int, default=[1, 4, 16], help="concurrent clients")
+    parser.add_argument("-n", "--logins", type=int, default=10, help="logins per client")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count(), help="hashing threads")
+    parser.add_argument("--max-pending", type=int, default=64, help="hashes that may wait for a thread")
+    parser.add_argument("-o", "--output", type=pathlib.Path, help="JSON file to write the results to")
+    args = parser.parse_args()
+
+    results = []
+    print(
+        f"{'target':>8}{'rounds':>10}{'mode':>8}{'clients':>8}{'logins/s':>10}{'rejected':>10}"
+        + percentile_columns("ms")
+    )
+    for target in args.targets:
+        service = HashingService(calibrate(target), workers=args.workers, max_pending=args.max_pending)
+        for mode in args.modes:
+            for clients in args.clients:
+                result = {"target_ms": target, "rounds": service.rounds, **run(service, mode, clients, args.logins)}
+                results.append(result)
+                print(
+                    f"{target:>8g}{service.rounds:>10}{mode:>8}{clients:>8}"
+                    f"{result['logins_per_second']:>10.1f}{result['rejected']:>10}"
+                    + "".join(f"{value:>10.1f}" for value in result["latency_ms"].values())
+                )
+        service.close()
+    if args.output:
+        write_report(
+            args.output,
+            {
+                "targets": args.targets,
+                "clients": args.clients,
+                "logins": args.logins,
+                "workers": args.workers,
+                "max_pending": args.max_pending,
+            },
+            results,
+        )
+
+
+if __name__ == "__main__":
+    main()
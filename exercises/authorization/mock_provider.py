@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for an OpenID Connect provider
+
+Serves just enough of the provider API for PandAuth to be tested and benchmarked without Google.
+Run it with `python mock_provider.py --port 5001` and point PandAuth at it with
+`FLASK_GOOGLE_CONFIG=http://127.0.0.1:5001/.well-known/openid-configuration`.
+
+@author:
+@version: 2025.12
+"""
+
+import argparse
+import contextlib
+import functools
+import hashlib
+import secrets
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from urllib.parse import urlencode
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import Flask, jsonify, redirect, request
+from jwt.algorithms import RSAAlgorithm
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """RSA key the provider signs ID tokens with"""
+
+    kid: str
+    private_key: rsa.RSAPrivateKey
+
+    @classmethod
+    def generate(cls, kid: str, bits: int = 2048) -> "SigningKey":
+        return cls(kid, rsa.generate_private_key(public_exponent=65537, key_size=bits))
+
+    def jwk(self) -> dict:
+        return {
+            **RSAAlgorithm.to_jwk(self.private_key.public_key(), as_dict=True),
+            "use": "sig",
+            "alg": "RS256",
+            "kid": self.kid,
+        }
+
+
+@functools.cache
+def signing_key(kid: str) -> SigningKey:
+    """Get a key generated once per process, so that every provider in a test run publishes the same keys"""
+    return SigningKey.generate(kid)
+
+
+def make_id_token(key: SigningKey, claims: dict, header: dict | None = None) -> str:
+    """Serialize and sign ID token claims as a compact JWT
+
+    :param key: key to sign with
+    :param claims: token claims
+    :param header: header fields to add or override, `"alg": "none"` for an unsigned token
+    """
+    header = {"kid": key.kid, **(header or {})}
+    algorithm = header.pop("alg", "RS256")
+    return jwt.encode(claims, None if algorithm == "none" else key.private_key, algorithm=algorithm, headers=header)
+
+
+def profile(base: str, sub: str) -> dict:
+    """Make up the profile of a user
+
+    :param base: provider URL
+    :param sub: user id
+    """
+    return {
+        "sub": sub,
+        "email": f"{sub}@example.com",
+        "email_verified": True,
+        "name": f"Panda {sub.title()}",
+        "given_name": "Panda",
+        "picture": f"{base}/picture/{sub}=s96-c",
+    }
+
+
+def png(size: int, color: tuple[int, int, int]) -> bytes:
+    """Encode a square of a single color as a PNG image"""
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    rows = (b"\x00" + bytes(color) * size) * size
+    header = struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+def create_provider() -> Flask:
+    """Create the provider app
+
+    The authorization code is the id of the user to log in, any code is accepted,
+    and the user is made up from it, with the claims in `app.config["profiles"][code]` overriding the made up ones.
+    ID tokens are signed with the first of `app.config["keys"]`,
+    and all of them are published, so keys can be rotated by prepending a new one.
+    The userinfo endpoint answers with the claims of the ID token issued along with the access token.
+    Profile pictures are served at any size, like Google does, after `app.config["PICTURE_DELAY"]` seconds.
+    Every request is counted per endpoint in `app.config["calls"]`.
+    """
+    provider = Flask(__name__)
+    provider.config["calls"] = {}
+    provider.config["profiles"] = {}
+    provider.config["tokens"] = {}
+    provider.config["keys"] = [signing_key("mock-1")]
+    provider.config["JWKS_MAX_AGE"] = 3600
+    provider.config["PICTURE_DELAY"] = 0
+    lock = threading.Lock()
+
+    @provider.before_request
+    def count_call():
+        with lock:
+            calls = provider.config["calls"]
+            calls[request.endpoint] = calls.get(request.endpoint, 0) + 1
+
+    @provider.get("/.well-known/openid-configuration")
+    def discovery():
+        base = request.host_url.rstrip("/")
+        return jsonify(
+            {
+                "issuer": base,
+                "authorization_endpoint": f"{base}/authorize",
+                "token_endpoint": f"{base}/token",
+                "userinfo_endpoint": f"{base}/userinfo",
+                "jwks_uri": f"{base}/jwks",
+            }
+        )
+
+    @provider.get("/authorize")
+    def authorize():
+        query = {"code": request.args.get("login_hint", "panda")}
+        if "state" in request.args:
+            query["state"] = request.args["state"]
+        return redirect(f"{request.args['redirect_uri']}?{urlencode(query)}")
+
+    @provider.post("/token")
+    def token():
+        code = request.form.get("code")
+        client_id = request.authorization.username if request.authorization else request.form.get("client_id")
+        if request.form.get("grant_type") != "authorization_code" or not code:
+            return jsonify({"error": "invalid_grant"}), 400
+        if not client_id:
+            return jsonify({"error": "invalid_client"}), 401
+        base = request.host_url.rstrip("/")
+        now = int(time.time())
+        claims = {
+            "iss": base,
+            "aud": client_id,
+            "iat": now,
+            "exp": now + 3600,
+            **profile(base, code),
+            **provider.config["profiles"].get(code, {}),
+        }
+        access_token = secrets.token_urlsafe()
+        with lock:
+            provider.config["tokens"][access_token] = claims
+        return jsonify(
+            {
+                "access_token": access_token,
+                "token_type": "Bearer",
+                "expires_in": 3599,
+                "scope": "openid email profile",
+                "id_token": make_id_token(provider.config["keys"][0], claims),
+            }
+        )
+
+    @provider.get("/userinfo")
+    def userinfo():
+        scheme, _, access_token = request.headers.get("Authorization", "").partition(" ")
+        claims = provider.config["tokens"].get(access_token) if scheme.lower() == "bearer" else None
+        if claims is None:
+            return jsonify({"error": "invalid_token"}), 401, {"WWW-Authenticate": 'Bearer error="invalid_token"'}
+        return jsonify({key: value for key, value in claims.items() if key not in ("iss", "aud", "iat", "exp")})
+
+    @provider.get("/jwks")
+    def jwks():
+        response = jsonify({"keys": [key.jwk() for key in provider.config["keys"]]})
+        response.cache_control.public = True
+        response.cache_control.max_age = provider.config["JWKS_MAX_AGE"]
+        return response
+
+    @provider.get("/picture/<sub>=s<int:size>-c")
+    def picture(sub, size):
+        time.sleep(provider.config["PICTURE_DELAY"])
+        color = tuple(hashlib.sha256(sub.encode()).digest()[:3])
+        return png(min(size, 1024), color), {"Content-Type": "image/png"}
+
+    return provider
+
+
+@contextlib.contextmanager
+def serve(app: Flask, port: int = 0) -> Iterator[str]:
+    """Run an app in a background thread for the duration of a `with` block
+
+    :param app: app to serve
+    :param port: port to listen on, 0 for any free one
+    :return: base URL of the server
+    """
+    server = make_server("127.0.0.1", port, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        thread.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("-p", "--port", type=int, default=5001)
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request")
+    args = parser.parse_args()
+
+    handler = WSGIRequestHandler if args.verbose else QuietHandler
+    server = make_server(args.host, args.port, create_provider(), threaded=True, request_handler=handler)
+    print(f"FLASK_GOOGLE_CONFIG=http://{args.host}:{server.server_port}/.well-known/openid-configuration", flush=True)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
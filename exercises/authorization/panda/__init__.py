@@ -6,26 +6,35 @@ PandAuth initialization
 @version: 2025.12
 """
 
+import atexit
 import pathlib
 import secrets
 
 import dotenv
-import requests
-from flask import Flask
+from flask import Flask, url_for
+from sqlalchemy import event
 from flask_login import LoginManager
 from flask_marshmallow import Marshmallow
 from flask_sqlalchemy import SQLAlchemy
-from oauthlib.oauth2 import WebApplicationClient
 
+from .audit import AuditLog
+from .avatars import AvatarStore
+from .oidc import FALLBACK_CONFIG, GOOGLE_DISCOVERY_URL, DiscoveryCache, StaticDiscovery, make_session
+from .ratelimit import MemoryBuckets, RateLimiter, SQLiteBuckets
+from .sessions import MemoryStore, ServerSessionInterface, SQLiteStore
+from .tokens import KeySet
+from .user_cache import UserCache
 
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
 db = SQLAlchemy()
 mm = Marshmallow()
-client = WebApplicationClient("")
+http = make_session()
+signing_keys = KeySet(http)
 
 
-def create_app() -> Flask:
+def create_app(test_config: dict | None = None) -> Flask:
+    from .admin import admin, parse_admins
     from .auth import auth
     from .routes import main
 
@@ -36,6 +45,10 @@ def create_app() -> Flask:
     dotenv.load_dotenv(app_dir / pathlib.Path(".flaskenv"))
     app.config.from_prefixed_env()
     app.config.from_mapping(dotenv.dotenv_values(app_dir / pathlib.Path(".env")))
+    if test_config:
+        app.config.update(test_config)
+
+    app.config["ADMINS"] = parse_admins(app.config.get("ADMINS", ()))
 
     # Initialize secret key if necessary
     if not app.config.get("SECRET_KEY"):
@@ -43,33 +56,117 @@ def create_app() -> Flask:
 
     # Initialize login subsystem
     login_manager.init_app(app)
-    with app.app_context():
-        client.client_id = app.config["GOOGLE_CLIENT_ID"]
-    GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
-    try:
-        app.config["GOOGLE_CONFIG"] = requests.get(GOOGLE_DISCOVERY_URL, timeout=5).json()
-    except requests.RequestException:
-        # Fallback for offline environments
-        app.config["GOOGLE_CONFIG"] = {
-            "authorization_endpoint": "https://accounts.google.com/o/oauth2/auth",
-            "token_endpoint": "https://oauth2.googleapis.com/token",
-            "userinfo_endpoint": "https://openidconnect.googleapis.com/v1/userinfo",
-        }
+    app.config["user_cache"] = UserCache(
+        app.config.get("USER_CACHE_SIZE", 1024), app.config.get("USER_CACHE_TTL", 300)
+    )
+
+    # Discover the provider without waiting for the network, GOOGLE_CONFIG is either the configuration itself
+    # or the discovery URL of another provider, e.g. the local stand-in, which has no fallback configuration
+    google_config = app.config.get("GOOGLE_CONFIG")
+    if "GOOGLE_CONFIG" in app.config and not isinstance(google_config, str):
+        app.config["discovery"] = StaticDiscovery(google_config)
+    else:
+        app.config["discovery"] = DiscoveryCache(
+            google_config or app.config.get("GOOGLE_DISCOVERY_URL", GOOGLE_DISCOVERY_URL),
+            app_dir / pathlib.Path(app.config.get("DISCOVERY_CACHE", "discovery.json")),
+            http,
+            ttl=app.config.get("DISCOVERY_TTL", 86400),
+            fallback=None if google_config else FALLBACK_CONFIG,
+        )
+        app.config["discovery"].get()
 
     # Initialize database
     database_name = app.config.get("DATABASE", "users.db")
     db_file = app_dir / pathlib.Path(f"{database_name}")
     app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:////{db_file}"
     app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS",
+        {"pool_size": 16, "max_overflow": 16, "pool_timeout": 10, "pool_recycle": 3600},
+    )
     db.init_app(app)
-    if not db_file.exists():
-        with app.app_context():
-            db.create_all()
     with app.app_context():
+        tune_sqlite(db.engine, app.config.get("SQLITE_BUSY_TIMEOUT", 5000))
+        if not db_file.exists():
+            db.create_all()
+        # Databases created before an index was added get it now
+        for index in db.metadata.tables["user"].indexes:
+            index.create(db.engine, checkfirst=True)
         mm.init_app(app)
 
+    # Keep sessions on the server, the cookie only carries the session id
+    session_backend = app.config.get("SESSION_BACKEND", "sqlite")
+    if session_backend == "memory":
+        app.session_interface = ServerSessionInterface(MemoryStore(app.config.get("SESSION_STORE_SIZE", 10_000)))
+    elif session_backend == "sqlite":
+        app.session_interface = ServerSessionInterface(
+            SQLiteStore(
+                db_file.with_name(app.config.get("SESSION_DATABASE", "sessions.db")),
+                sweep_interval=app.config.get("SESSION_SWEEP_INTERVAL", 60),
+                sweep_batch=app.config.get("SESSION_SWEEP_BATCH", 500),
+                busy_timeout=app.config.get("SQLITE_BUSY_TIMEOUT", 5000),
+            )
+        )
+    elif session_backend != "cookie":
+        raise ValueError(f"Unknown session backend {session_backend}")
+
+    # Limit login attempts per client, in every worker or across workers
+    rate_limit_backend = app.config.get("RATE_LIMIT_BACKEND", "memory")
+    if rate_limit_backend == "memory":
+        buckets = MemoryBuckets(app.config.get("RATE_LIMIT_SIZE", 100_000))
+    elif rate_limit_backend == "sqlite":
+        buckets = SQLiteBuckets(
+            db_file.with_name(app.config.get("RATE_LIMIT_DATABASE", "ratelimit.db")),
+            busy_timeout=app.config.get("SQLITE_BUSY_TIMEOUT", 5000),
+        )
+    else:
+        raise ValueError(f"Unknown rate limit backend {rate_limit_backend}")
+    app.config["rate_limiter"] = RateLimiter(buckets, app.config.get("RATE_LIMITS", {"ip": (0.5, 20)}))
+
+    # Record logins and logouts off the request thread
+    app.config["audit"] = AuditLog(
+        db_file.with_name(app.config.get("AUDIT_DATABASE", "audit.db")),
+        batch_size=app.config.get("AUDIT_BATCH_SIZE", 100),
+        flush_interval=app.config.get("AUDIT_FLUSH_INTERVAL", 1.0),
+        busy_timeout=app.config.get("SQLITE_BUSY_TIMEOUT", 5000),
+    )
+    atexit.register(app.config["audit"].close)
+
+    # Serve profile pictures from disk
+    app.config["avatars"] = AvatarStore(
+        app_dir / pathlib.Path(app.config.get("AVATAR_DIR", "avatars")),
+        http,
+        sizes=tuple(app.config.get("AVATAR_SIZES", (48, 96, 192))),
+    )
+    app.add_template_global(avatar_url)
+
     # Register routes
     app.register_blueprint(main)
     app.register_blueprint(auth)
+    app.register_blueprint(admin)
 
     return app
+
+
+def avatar_url(user, size: int = 96) -> str:
+    """URL of the stored profile picture of a user, which changes whenever the picture does"""
+    return url_for("main.avatar", user_id=user.id, size=size, v=AvatarStore.version(user.picture or ""))
+
+
+def tune_sqlite(engine, busy_timeout: int) -> None:
+    """Set up every new connection for concurrent readers and writers
+
+    Write-ahead logging lets readers proceed while a login is written,
+    and writers wait up to `busy_timeout` milliseconds for each other instead of failing.
+
+    :param engine: engine of the SQLite database
+    :param busy_timeout: milliseconds to wait for a lock
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(connection, _):
+        cursor = connection.cursor()
+        cursor.execute("pragma journal_mode=WAL;")
+        cursor.execute("pragma synchronous=NORMAL;")
+        cursor.execute(f"pragma busy_timeout={int(busy_timeout)};")
+        cursor.close()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+PandAuth administration
+
+@author:
+@version: 2025.12
+"""
+
+import csv
+import datetime
+import functools
+import io
+import json
+from collections.abc import Iterable, Iterator
+
+from flask import Blueprint, abort, current_app, jsonify, request, stream_with_context
+from flask_login import current_user, login_required
+from sqlalchemy import select, tuple_
+
+from . import db
+from .models import User, UserSchema
+
+admin = Blueprint("admin", __name__, url_prefix="/admin")
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+MAX_AUDIT_EVENTS = 10_000
+
+
+def parse_admins(admins: str | Iterable[str]) -> frozenset[str]:
+    """Normalize the `ADMINS` setting to a set of lower-case emails
+
+    :param admins: comma-separated emails, as read from .env, or a list of emails
+    """
+    emails = admins.split(",") if isinstance(admins, str) else admins
+    return frozenset(email.strip().lower() for email in emails if email.strip())
+
+
+def admin_required(view):
+    """Let only the users listed in `ADMINS` by email in, see `parse_admins`"""
+
+    @functools.wraps(view)
+    @login_required
+    def wrapper(*args, **kwargs):
+        if (current_user.email or "").lower() not in current_app.config["ADMINS"]:
+            abort(403)
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def user_batches(
+    batch_size: int,
+    since: datetime.datetime | None = None,
+    until: datetime.datetime | None = None,
+) -> Iterator[list[User]]:
+    """Walk the users in registration order, one batch at a time
+
+    Every batch is a separate query that starts after the last user of the previous one,
+    so neither the database nor the app holds more than a batch, however many users there are.
+
+    :param batch_size: number of users per batch
+    :param since: earliest registration time, inclusive
+    :param until: latest registration time, exclusive
+    """
+    query = select(User).order_by(User.registered, User.id).limit(batch_size)
+    if since is not None:
+        query = query.where(User.registered >= since)
+    if until is not None:
+        query = query.where(User.registered < until)
+    last = None
+    while True:
+        batch_query = query if last is None else query.where(tuple_(User.registered, User.id) > last)
+        batch = db.session.scalars(batch_query).all()
+        if not batch:
+            return
+        last = (batch[-1].registered, batch[-1].id)
+        db.session.expunge_all()
+        yield batch
+        if len(batch) < batch_size:
+            return
+
+
+def time_range() -> tuple[datetime.datetime | None, datetime.datetime | None]:
+    """Get the `since` and `until` query arguments (ISO 8601 dates or times)"""
+    try:
+        return tuple(
+            datetime.datetime.fromisoformat(request.args[arg]) if arg in request.args else None
+            for arg in ("since", "until")
+        )
+    except ValueError:
+        abort(400)
+
+
+def serialize(batches: Iterator[list[User]], export_format: str) -> Iterator[str]:
+    """Serialize batches of users as NDJSON lines or CSV rows
+
+    :param batches: batches of users
+    :param export_format: ndjson|csv
+    """
+    schema = UserSchema(many=True)
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=list(schema.fields))
+        writer.writeheader()
+        yield buffer.getvalue()
+    for batch in batches:
+        users = schema.dump(batch)
+        if export_format == "csv":
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(users)
+            yield buffer.getvalue()
+        else:
+            yield "".join(json.dumps(user) + "\n" for user in users)
+
+
+@admin.get("/users.<export_format>")
+@admin_required
+def export_users(export_format):
+    """Export users registered between `since` and `until` (ISO 8601 dates or times)"""
+    if export_format not in EXPORT_FORMATS:
+        abort(404)
+    since, until = time_range()
+    batches = user_batches(current_app.config.get("EXPORT_BATCH_SIZE", 1000), since, until)
+    return current_app.response_class(
+        stream_with_context(serialize(batches, export_format)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename=users.{export_format}"},
+    )
+
+
+@admin.get("/audit")
+@admin_required
+def audit_events():
+    """Logins and logouts between `since` and `until`, newest first, optionally of one `user` or `event` kind"""
+    since, until = time_range()
+    events = current_app.config["audit"].events(
+        since.timestamp() if since else None,
+        until.timestamp() if until else None,
+        user_id=request.args.get("user"),
+        event=request.args.get("event"),
+        limit=max(1, min(request.args.get("limit", 1000, type=int), MAX_AUDIT_EVENTS)),
+    )
+    for event in events:
+        event["time"] = datetime.datetime.fromtimestamp(event["time"]).isoformat()
+    return jsonify(events)
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+PandAuth audit log
+
+@author:
+@version: 2025.12
+"""
+
+import logging
+import pathlib
+import queue
+import sqlite3
+import threading
+import time
+
+from .sqlite import Connections
+
+logger = logging.getLogger(__name__)
+
+
+class AuditLog:
+    """
+    Record of logins and logouts written by a background thread
+
+    Recording an event only puts it on a queue, so the auth views never wait for a commit.
+    The writer stores queued events in one transaction once `batch_size` of them are waiting
+    or the oldest has waited `flush_interval` seconds. Closing the log writes whatever is left.
+    When the writer cannot keep up and `max_queue` events are waiting, new events are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+        busy_timeout: int = 5000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._connection = Connections(path, busy_timeout).get
+        with self._connection() as connection:
+            connection.execute(
+                "create table if not exists audit "
+                "(id integer primary key, time real not null, event text not null, user_id text, ip text, user_agent text);"
+            )
+            connection.execute("create index if not exists audit_time on audit (time);")
+            connection.execute("create index if not exists audit_user_time on audit (user_id, time);")
+        self._writer = threading.Thread(target=self._write, name="audit-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, event: str, user_id: str | None, ip: str | None = None, user_agent: str | None = None) -> None:
+        """Queue an event without waiting
+
+        :param event: what happened, e.g. login or logout
+        :param user_id: who it happened to, None if unknown
+        :param ip: client address
+        :param user_agent: client software
+        """
+        try:
+            self._queue.put_nowait((time.time(), event, user_id, ip, user_agent))
+        except queue.Full:
+            self.dropped += 1
+            logger.warning("Audit queue is full, dropped %s of %s", event, user_id)
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every event recorded so far is written"""
+        written = threading.Event()
+        self._queue.put(written)
+        return written.wait(timeout)
+
+    def close(self, timeout: float | None = None) -> None:
+        """Write the queued events and stop the writer"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout)
+
+    def _write(self) -> None:
+        running = True
+        while running:
+            batch, markers = [], []
+            item = self._queue.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is None:
+                    running = False
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if not running or markers or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if not running:
+                # Drain whatever was recorded before closing
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        markers.append(item)
+                    elif item is not None:
+                        batch.append(item)
+            if batch:
+                self._insert(batch)
+            for marker in markers:
+                marker.set()
+
+    def _insert(self, batch: list[tuple]) -> None:
+        try:
+            with self._connection() as connection:
+                connection.executemany(
+                    "insert into audit (time, event, user_id, ip, user_agent) values (?, ?, ?, ?, ?);", batch
+                )
+        except sqlite3.Error as error:
+            logger.error("Cannot write %d audit events: %s", len(batch), error)
+            return
+        self.written += len(batch)
+        self.batches += 1
+
+    def events(
+        self,
+        since: float | None = None,
+        until: float | None = None,
+        user_id: str | None = None,
+        event: str | None = None,
+        limit: int = 1000,
+    ) -> list[dict]:
+        """Get the written events, newest first
+
+        :param since: earliest time, inclusive, as a Unix timestamp
+        :param until: latest time, exclusive, as a Unix timestamp
+        :param user_id: only the events of this user
+        :param event: only the events of this kind
+        :param limit: maximum number of events
+        """
+        conditions, params = [], []
+        for condition, value in (
+            ("time>=?", since),
+            ("time<?", until),
+            ("user_id=?", user_id),
+            ("event=?", event),
+        ):
+            if value is not None:
+                conditions.append(condition)
+                params.append(value)
+        where = f"where {' and '.join(conditions)}" if conditions else ""
+        cursor = self._connection().execute(
+            f"select time, event, user_id, ip, user_agent from audit {where} order by time desc, id desc limit ?;",
+            (*params, limit),
+        )
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
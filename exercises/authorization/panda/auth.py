@@ -6,26 +6,42 @@ PandAuth authentication
 @version: 2025.12
 """
 
-import datetime
 import json
 
 import requests
-from flask import Blueprint, current_app, redirect, request, url_for
-from flask_login import login_required, login_user, logout_user
+from flask import Blueprint, current_app, jsonify, redirect, request, session, url_for
+from flask_login import current_user, login_required, login_user, logout_user
+from oauthlib.oauth2 import OAuth2Error, WebApplicationClient
+from werkzeug.exceptions import ServiceUnavailable
 
-from . import client, db, login_manager
-from .models import User
+from . import db, http, login_manager, signing_keys
+from .models import User, upsert_user
+from .ratelimit import rate_limited
+from .sessions import ServerSession
+from .tokens import InvalidToken, verify_id_token
 
 auth = Blueprint("auth", __name__, url_prefix="/auth")
 
 
+def oauth_client() -> WebApplicationClient:
+    """Create an OAuth client for the current request
+
+    The client stores the token it receives, so it must not be shared between concurrent logins.
+    """
+    return WebApplicationClient(current_app.config["GOOGLE_CLIENT_ID"])
+
+
 @auth.get("/login")
+@rate_limited("ip")
 def login():
     """Log in"""
 
-    google_provider_cfg = current_app.config["GOOGLE_CONFIG"]
+    google_provider_cfg = current_app.config["discovery"].get()
+    if "authorization_endpoint" not in google_provider_cfg:
+        # A provider without a fallback configuration has not been discovered yet
+        raise ServiceUnavailable(retry_after=5)
     authorization_endpoint = google_provider_cfg["authorization_endpoint"]
-    request_uri = client.prepare_request_uri(
+    request_uri = oauth_client().prepare_request_uri(
         authorization_endpoint,
         redirect_uri=url_for("auth.callback", _external=True, _scheme="https"),
         scope=["openid", "email", "profile"],
@@ -34,6 +50,7 @@ def login():
 
 
 @auth.route("/login/callback")
+@rate_limited("ip")
 def callback():
     """Google callback"""
 
@@ -41,7 +58,10 @@ def callback():
     if not code:
         return redirect(url_for("main.index"))
 
-    google_provider_cfg = current_app.config["GOOGLE_CONFIG"]
+    google_provider_cfg = current_app.config["discovery"].get()
+    if not {"token_endpoint", "jwks_uri", "issuer"} <= google_provider_cfg.keys():
+        raise ServiceUnavailable(retry_after=5)
+    client = oauth_client()
     try:
         token_endpoint = google_provider_cfg["token_endpoint"]
         token_url, headers, body = client.prepare_token_request(
@@ -50,7 +70,7 @@ def callback():
             redirect_url=request.base_url,
             code=code,
         )
-        token_response = requests.post(
+        token_response = http.post(
             token_url,
             headers=headers,
             data=body,
@@ -59,30 +79,31 @@ def callback():
         )
         client.parse_request_body_response(json.dumps(token_response.json()))
 
-        userinfo_endpoint = google_provider_cfg["userinfo_endpoint"]
-        uri, headers, body = client.add_token(userinfo_endpoint)
-        userinfo_response = requests.get(uri, headers=headers, data=body, timeout=5).json()
-    except requests.RequestException:
+        # The profile is read from the signed ID token instead of asking the userinfo endpoint
+        userinfo = verify_id_token(
+            client.token.get("id_token", ""),
+            signing_keys,
+            google_provider_cfg["jwks_uri"],
+            google_provider_cfg["issuer"],
+            client.client_id,
+        )
+    except (requests.RequestException, OAuth2Error, InvalidToken):
+        audit("login_failed", None)
         return redirect(url_for("main.index"))
 
-    unique_id = userinfo_response.get("sub")
-    users_email = userinfo_response.get("email")
-    picture = userinfo_response.get("picture")
-    users_name = userinfo_response.get("given_name", userinfo_response.get("name", ""))
-
-    user = db.session.query(User).filter_by(id=unique_id).first()
-    if not user:
-        user = User(
-            id=unique_id,
-            email=users_email,
-            name=users_name,
-            picture=picture,
-            registered=datetime.datetime.now(),
-        )
-        db.session.add(user)
-        db.session.commit()
+    unique_id = userinfo.get("sub")
+    users_email = userinfo.get("email")
+    picture = userinfo.get("picture")
+    users_name = userinfo.get("given_name", userinfo.get("name", ""))
+
+    user = upsert_user(unique_id, users_email, users_name, picture)
+    current_app.config["user_cache"].invalidate(unique_id)
 
+    # A session id planted before the login must not carry over to the logged in user
+    if isinstance(session, ServerSession):
+        session.rotate()
     login_user(user)
+    audit("login", user.id)
     return redirect(url_for("main.index"))
 
 
@@ -90,11 +111,37 @@ def callback():
 @login_required
 def logout():
     """Log out"""
+    audit("logout", current_user.id)
     logout_user()
+    # Empty the whole session, not only the login, so that its server-side id is always revoked
+    session.clear()
     return redirect(url_for("main.index"))
 
 
+@auth.get("/cache")
+@login_required
+def cache_stats():
+    """User cache statistics"""
+    return jsonify(current_app.config["user_cache"].stats())
+
+
+def audit(event: str, user_id: str | None) -> None:
+    """Queue an audit event about the current request"""
+    current_app.config["audit"].record(event, user_id, request.remote_addr, request.user_agent.string)
+
+
 @login_manager.user_loader
 def load_user(user_id):
-    """User loader"""
-    return db.session.query(User).filter_by(id=user_id).first()
+    """User loader
+
+    Users are served from the user cache as detached copies, so most requests do not query the database.
+    """
+    snapshot = current_app.config["user_cache"].get(user_id, _query_user)
+    return User(**snapshot) if snapshot is not None else None
+
+
+def _query_user(user_id) -> dict | None:
+    user = db.session.query(User).filter_by(id=user_id).first()
+    if user is None:
+        return None
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
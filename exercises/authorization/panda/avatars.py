@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+PandAuth avatar proxy
+
+@author:
+@version: 2025.12
+"""
+
+import hashlib
+import logging
+import os
+import pathlib
+import re
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import requests
+
+# Google serves a profile picture at any size when the URL ends with `=s<size>-c`
+GOOGLE_SIZE = re.compile(r"=s\d+(-c)?$")
+IMAGE_TYPES = {
+    b"\x89PNG\r\n\x1a\n": "image/png",
+    b"\xff\xd8\xff": "image/jpeg",
+    b"GIF87a": "image/gif",
+    b"GIF89a": "image/gif",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class AvatarError(Exception):
+    """The picture could not be fetched or is not an image"""
+
+
+def sized_url(url: str, size: int) -> str | None:
+    """Get the URL of a picture at the given size, None if the host cannot resize it"""
+    if not GOOGLE_SIZE.search(url):
+        return None
+    return GOOGLE_SIZE.sub(f"=s{size}-c", url)
+
+
+def image_type(data: bytes) -> str | None:
+    for magic, mimetype in IMAGE_TYPES.items():
+        if data.startswith(magic):
+            return mimetype
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def suffix(mimetype: str) -> str:
+    return f".{mimetype.removeprefix('image/')}"
+
+
+class AvatarStore:
+    """
+    Profile pictures fetched once per size and kept on disk
+
+    Variants are named after the picture URL, which changes whenever the picture does,
+    so a stored variant never has to be checked again.
+    Only Google pictures (URLs ending with `=s<size>-c`) are resized, pictures of other hosts
+    are stored once at their original size and served for every size.
+    Concurrent requests for the same variant wait for a single fetch,
+    and a failed fetch is not retried for `failure_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        directory: pathlib.Path,
+        session: requests.Session,
+        sizes: tuple[int, ...] = (48, 96, 192),
+        max_bytes: int = 5 * 2**20,
+        timeout: float = 5,
+        failure_ttl: float = 60,
+    ):
+        self.directory = directory
+        self.session = session
+        self.sizes = sizes
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.failure_ttl = failure_ttl
+        self.fetches = 0
+        self._pending: dict[pathlib.Path, Future] = {}
+        self._failures: dict[pathlib.Path, tuple[float, AvatarError]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def version(url: str) -> str:
+        """Short digest of the picture URL, used in file names, ETags, and avatar URLs"""
+        return hashlib.sha256(url.encode()).hexdigest()[:16]
+
+    def get(self, url: str, size: int) -> tuple[pathlib.Path, str]:
+        """Get the stored variant of a picture, fetching it on the first request
+
+        :param url: picture URL
+        :param size: width and height in pixels, one of `sizes`
+        :return: path and content type of the variant
+        :raises AvatarError: the picture could not be fetched
+        """
+        source = sized_url(url, size)
+        path = self.directory / f"{self.version(url)}-{size if source else 'original'}"
+        for mimetype in (*dict.fromkeys(IMAGE_TYPES.values()), "image/webp"):
+            if (stored := path.with_suffix(suffix(mimetype))).exists():
+                return stored, mimetype
+
+        with self._lock:
+            failed_until, failure = self._failures.get(path, (0.0, None))
+            if time.monotonic() < failed_until:
+                raise failure
+            future = self._pending.get(path)
+            fetching = future is None
+            if fetching:
+                future = self._pending[path] = Future()
+        if not fetching:
+            try:
+                return future.result(timeout=self.timeout * 2)
+            except FutureTimeout as error:
+                raise AvatarError(f"Timed out waiting for {source or url}") from error
+        try:
+            future.set_result(self._fetch(source or url, path))
+        except AvatarError as error:
+            future.set_exception(error)
+            self._remember_failure(path, error)
+        finally:
+            with self._lock:
+                del self._pending[path]
+        return future.result()
+
+    def _remember_failure(self, path: pathlib.Path, error: AvatarError) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for expired in [key for key, (until, _) in self._failures.items() if until <= now]:
+                del self._failures[expired]
+            self._failures[path] = (now + self.failure_ttl, error)
+
+    def _fetch(self, url: str, path: pathlib.Path) -> tuple[pathlib.Path, str]:
+        with self._lock:
+            self.fetches += 1
+        try:
+            with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                response.raise_for_status()
+                data = b""
+                for chunk in response.iter_content(64 * 1024):
+                    data += chunk
+                    if len(data) > self.max_bytes:
+                        break
+        except requests.RequestException as error:
+            raise AvatarError(f"Cannot fetch {url}: {error}") from error
+        mimetype = image_type(data)
+        if mimetype is None or len(data) > self.max_bytes:
+            raise AvatarError(f"{url} is not an image of at most {self.max_bytes} bytes")
+        stored = path.with_suffix(suffix(mimetype))
+        staging = stored.with_name(f"{stored.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            staging.write_bytes(data)
+            os.replace(staging, stored)
+        except OSError as error:
+            staging.unlink(missing_ok=True)
+            raise AvatarError(f"Cannot save {stored}: {error}") from error
+        logger.info("Stored %s as %s", url, stored.name)
+        return stored, mimetype
@@ -9,6 +9,7 @@ PandAuth models
 import datetime
 
 from flask_login import UserMixin
+from sqlalchemy.dialects.sqlite import insert
 from sqlalchemy.orm import Mapped, mapped_column
 
 from . import db, mm
@@ -22,13 +23,35 @@ class User(UserMixin, db.Model):
     name: Mapped[str] = mapped_column(db.String(256), nullable=False)
     picture: Mapped[str] = mapped_column(db.String(512), nullable=True)
     registered: Mapped[datetime.datetime] = mapped_column(
-        db.DateTime, default=datetime.datetime.utcnow, nullable=False
+        db.DateTime, default=datetime.datetime.utcnow, nullable=False, index=True
     )
 
     def __repr__(self) -> str:  # pragma: no cover - convenience for debugging
         return f"<User {self.email}>"
 
 
+def upsert_user(id: str, email: str, name: str, picture: str | None) -> User:
+    """Create a user or refresh their profile in a single statement
+
+    The registration time of an existing user is kept.
+    Returns a copy of the stored user that is detached from the session.
+    """
+    statement = insert(User).values(
+        id=id, email=email, name=name, picture=picture, registered=datetime.datetime.now()
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[User.id],
+        set_={
+            "email": statement.excluded.email,
+            "name": statement.excluded.name,
+            "picture": statement.excluded.picture,
+        },
+    ).returning(*User.__table__.columns)
+    row = db.session.execute(statement).one()
+    db.session.commit()
+    return User(**row._asdict())
+
+
 # Marshmallow schema
 class UserSchema(mm.SQLAlchemyAutoSchema):
     """User schema"""
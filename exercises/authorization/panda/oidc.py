@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+PandAuth OpenID Connect provider access
+
+@author:
+@version: 2025.12
+"""
+
+import json
+import logging
+import os
+import pathlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GOOGLE_DISCOVERY_URL = "https://accounts.google.com/.well-known/openid-configuration"
+FALLBACK_CONFIG = {
+    "issuer": "https://accounts.google.com",
+    "authorization_endpoint": "https://accounts.google.com/o/oauth2/auth",
+    "token_endpoint": "https://oauth2.googleapis.com/token",
+    "userinfo_endpoint": "https://openidconnect.googleapis.com/v1/userinfo",
+    "jwks_uri": "https://www.googleapis.com/oauth2/v3/certs",
+}
+
+logger = logging.getLogger(__name__)
+
+
+def make_session(retries: int = 3, pool_size: int = 10) -> requests.Session:
+    """Create an HTTP session that keeps connections to the provider alive
+
+    Failed connections are retried with backoff for every method,
+    but only idempotent requests are retried after the provider answered with an error,
+    so an authorization code is never redeemed twice.
+
+    :param retries: number of retries of a single request
+    :param pool_size: number of connections kept per host
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.2,
+        status_forcelist=(429, 500, 502, 503, 504),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=pool_size)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DiscoveryCache:
+    """
+    Provider configuration kept in memory and on disk
+
+    The configuration is served from memory without waiting for the network:
+    a stale or missing document is refreshed in a background thread,
+    and until the first refresh succeeds, the copy on disk or the fallback is used.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        path: pathlib.Path | None,
+        session: requests.Session,
+        ttl: float = 86400,
+        fallback: dict | None = None,
+        timeout: float = 5,
+    ):
+        self.url = url
+        self.path = path
+        self.session = session
+        self.ttl = ttl
+        self.timeout = timeout
+        self._config = dict(fallback or {})
+        self._fetched = 0.0
+        self._retry_at = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def is_stale(self) -> bool:
+        return time.time() - self._fetched >= self.ttl
+
+    def get(self) -> dict:
+        """Get the current configuration, refreshing it in the background if it is stale"""
+        if self.is_stale:
+            self.refresh_in_background()
+        return self._config
+
+    def refresh_in_background(self) -> None:
+        """Start a refresh unless one is running or the previous one failed recently"""
+        with self._lock:
+            if self._refreshing or time.time() < self._retry_at:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_and_release, name="discovery-refresh", daemon=True).start()
+
+    def refresh(self) -> bool:
+        """Download the configuration and save it to disk
+
+        Returns False if the provider could not be reached or answered with something unusable.
+        """
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            response.raise_for_status()
+            config = response.json()
+        except (requests.RequestException, ValueError) as error:
+            logger.warning("Cannot refresh %s: %s", self.url, error)
+            self._retry_at = time.time() + min(self.ttl, 60)
+            return False
+        self._config, self._fetched = config, time.time()
+        self._save()
+        return True
+
+    def _refresh_and_release(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            saved = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        if saved.get("url") == self.url and isinstance(saved.get("config"), dict):
+            self._config, self._fetched = saved["config"], saved.get("fetched", 0.0)
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        staging = self.path.with_name(f"{self.path.name}.{os.getpid()}.{threading.get_ident()}")
+        try:
+            staging.write_text(json.dumps({"url": self.url, "fetched": self._fetched, "config": self._config}))
+            os.replace(staging, self.path)
+        except OSError as error:
+            logger.warning("Cannot save %s: %s", self.path, error)
+            staging.unlink(missing_ok=True)
+
+
+class StaticDiscovery:
+    """Provider configuration given up front, e.g. for tests"""
+
+    def __init__(self, config: dict):
+        self._config = config
+
+    def get(self) -> dict:
+        return self._config
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+PandAuth login rate limiting
+
+@author:
+@version: 2025.12
+"""
+
+import functools
+import math
+import pathlib
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+from .sqlite import Connections, Sweeper
+
+
+class MemoryBuckets:
+    """
+    Token buckets in process memory, bounded by evicting the least recently used
+
+    An evicted bucket comes back full, so the size must cover the clients seen within a refill period.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """Take a token from a bucket, returns the seconds to wait for one, 0 if it was taken"""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1 if wait == 0 else tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.maxsize:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class SQLiteBuckets:
+    """
+    Token buckets in a SQLite database, so that limits hold across worker processes
+
+    Buckets that have been idle long enough to be full again are deleted
+    at most `sweep_batch` at a time, at most once every `sweep_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        sweep_interval: float = 60,
+        sweep_batch: int = 500,
+        busy_timeout: int = 5000,
+    ):
+        self.path = path
+        self._connection = Connections(path, busy_timeout, isolation_level=None).get
+        self._sweeper = Sweeper("bucket", "full_at", sweep_interval, sweep_batch)
+        with self._connection() as connection:
+            connection.execute(
+                "create table if not exists bucket "
+                "(key text primary key, tokens real not null, updated real not null, full_at real not null);"
+            )
+            connection.execute("create index if not exists bucket_full_at on bucket (full_at);")
+
+    def __len__(self) -> int:
+        return self._connection().execute("select count(*) from bucket;").fetchone()[0]
+
+    def take(self, key: str, rate: float, burst: float, now: float) -> float:
+        """Take a token from a bucket, returns the seconds to wait for one, 0 if it was taken"""
+        connection = self._connection()
+        # Take the write lock up front, so that concurrent workers cannot both spend the last token
+        connection.execute("begin immediate;")
+        try:
+            row = connection.execute("select tokens, updated from bucket where key=?;", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            tokens = tokens - 1 if wait == 0 else tokens
+            connection.execute(
+                "insert into bucket (key, tokens, updated, full_at) values (?, ?, ?, ?) "
+                "on conflict (key) do update set tokens=excluded.tokens, updated=excluded.updated, full_at=excluded.full_at;",
+                (key, tokens, now, now + (burst - tokens) / rate),
+            )
+            if self._sweeper.is_due(now):
+                self._sweeper.sweep(connection, now)
+            connection.execute("commit;")
+        except BaseException:
+            connection.execute("rollback;")
+            raise
+        return wait
+
+
+class RateLimiter:
+    """
+    Token bucket limits per scope, e.g. per client address and per account
+
+    The security exercise limits its password logins with it too.
+    A scope allows `burst` attempts at once and then `rate` attempts per second.
+    Every check is a constant number of dictionary or primary key operations.
+
+    :param backend: where the buckets are kept
+    :param limits: rate and burst per scope
+    """
+
+    def __init__(self, backend: MemoryBuckets | SQLiteBuckets, limits: dict[str, tuple[float, float]]):
+        self.backend = backend
+        self.limits = limits
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, scope: str, key: str) -> float:
+        """Count an attempt, returns the seconds to wait before trying again, 0 if it is allowed"""
+        if scope not in self.limits:
+            return 0.0
+        rate, burst = self.limits[scope]
+        wait = self.backend.take(f"{scope}:{key}", rate, burst, time.time())
+        if wait:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+
+def client_address() -> str | None:
+    """Address of the client, as seen by the app (see `werkzeug.middleware.proxy_fix` behind a proxy)"""
+    return request.remote_addr
+
+
+def rate_limited(scope: str, key: Callable[[], str | None] = client_address):
+    """Reject a request with 429 Too Many Requests once its client or account is out of attempts
+
+    The limiter is taken from `app.config["rate_limiter"]`, and no limiter means no limit.
+    Decorators are checked from the outermost in, so put the cheapest and widest scope first.
+
+    :param scope: name of the limit to apply
+    :param key: function returning whom the current request counts against, None to not count it
+    """
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            limiter = current_app.config.get("rate_limiter")
+            who = key()
+            if limiter is not None and who is not None:
+                wait = limiter.hit(scope, who)
+                if wait:
+                    raise TooManyRequests(retry_after=math.ceil(wait))
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -6,11 +6,41 @@ PandAuth routes
 @version: 2025.12
 """
 
-from flask import Blueprint, render_template
+from flask import Blueprint, abort, current_app, redirect, render_template, request, send_file, url_for
+
+from .auth import load_user
+from .avatars import AvatarError
 
 main = Blueprint("main", __name__, url_prefix="/")
 
 
 @main.route("/")
 def index():
-    return render_template("index.jinja")
\ No newline at end of file
+    return render_template("index.jinja")
+
+
+@main.get("/avatar/<user_id>")
+def avatar(user_id):
+    """Profile picture of a user, fetched once and then served from disk
+
+    Avatar URLs carry the picture version `v`, so browsers may keep a response for a year.
+    A request without the current version is redirected to the URL that has it.
+    Pictures not hosted by Google are served at their original size, whatever the `size`.
+    """
+    avatars = current_app.config["avatars"]
+    size = request.args.get("size", 96, type=int)
+    user = load_user(user_id)
+    if user is None or not user.picture or size not in avatars.sizes:
+        abort(404)
+    version = avatars.version(user.picture)
+    if request.args.get("v") != version:
+        return redirect(url_for("main.avatar", user_id=user_id, size=size, v=version))
+    try:
+        path, mimetype = avatars.get(user.picture, size)
+    except AvatarError:
+        abort(502)
+    response = send_file(path, mimetype=mimetype, etag=f"{version}-{size}", conditional=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+PandAuth server-side sessions
+
+@author:
+@version: 2025.12
+"""
+
+import pathlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from flask import Flask, Request, Response
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+from .sqlite import Connections, Sweeper
+
+serializer = TaggedJSONSerializer()
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session data kept on the server, the cookie only carries its id
+
+    :param initial: stored session data
+    :param sid: session id, None for a new session
+    """
+
+    def __init__(self, initial: dict | None = None, sid: str | None = None):
+        def on_update(self) -> None:
+            self.modified = True
+            self.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.accessed = False
+        self.rotated_from: str | None = None
+
+    # Reads count as access too, so that responses that depend on the session get `Vary: Cookie`
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    def rotate(self) -> None:
+        """Move the data to a new id, e.g. on login, so that an id planted before cannot be used after"""
+        if self.sid is not None and self.rotated_from is None:
+            self.rotated_from = self.sid
+        self.sid = None
+        self.modified = True
+
+
+class MemoryStore:
+    """
+    Bounded LRU store of sessions in process memory
+
+    Sessions are lost on restart and are not shared between worker processes.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        self.maxsize = maxsize
+        self._sessions: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def load(self, sid: str) -> str | None:
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                del self._sessions[sid]
+                return None
+            self._sessions.move_to_end(sid)
+            return entry[1]
+
+    def save(self, sid: str, data: str, expires: float) -> None:
+        with self._lock:
+            self._sessions[sid] = (expires, data)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+
+class SQLiteStore:
+    """
+    Store of sessions in a SQLite database shared by all worker processes
+
+    Expired sessions are never loaded, and they are deleted at most `sweep_batch` at a time,
+    at most once every `sweep_interval` seconds, by whichever request saves a session next.
+    """
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        sweep_interval: float = 60,
+        sweep_batch: int = 500,
+        busy_timeout: int = 5000,
+    ):
+        self.path = path
+        self._connection = Connections(path, busy_timeout).get
+        self._sweeper = Sweeper("session", "expires", sweep_interval, sweep_batch)
+        with self._connection() as connection:
+            connection.execute(
+                "create table if not exists session (sid text primary key, data text not null, expires real not null);"
+            )
+            connection.execute("create index if not exists session_expires on session (expires);")
+
+    def __len__(self) -> int:
+        return self._connection().execute("select count(*) from session;").fetchone()[0]
+
+    def load(self, sid: str) -> str | None:
+        row = (
+            self._connection()
+            .execute("select data from session where sid=? and expires>?;", (sid, time.time()))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def save(self, sid: str, data: str, expires: float) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "insert into session (sid, data, expires) values (?, ?, ?) "
+                "on conflict (sid) do update set data=excluded.data, expires=excluded.expires;",
+                (sid, data, expires),
+            )
+        if self._sweeper.is_due(time.time()):
+            self.sweep()
+
+    def delete(self, sid: str) -> None:
+        with self._connection() as connection:
+            connection.execute("delete from session where sid=?;", (sid,))
+
+    def sweep(self) -> int:
+        """Delete a batch of expired sessions, returns the number of deleted sessions"""
+        with self._connection() as connection:
+            return self._sweeper.sweep(connection, time.time())
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Sessions stored on the server under a random id sent in the cookie
+
+    A session is loaded once when the request starts and saved only if it was modified.
+    Emptying a session deletes it from the store, which revokes it.
+    """
+
+    session_class = ServerSession
+
+    def __init__(self, store: MemoryStore | SQLiteStore):
+        self.store = store
+
+    def open_session(self, app: Flask, request: Request) -> ServerSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return self.session_class(serializer.loads(data), sid)
+        return self.session_class()
+
+    def save_session(self, app: Flask, session: ServerSession, response: Response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.accessed:
+            response.vary.add("Cookie")
+        if session.rotated_from is not None:
+            self.store.delete(session.rotated_from)
+        if not session:
+            if session.modified and not session.new:
+                if session.sid is not None:
+                    self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+        if session.sid is None:
+            session.sid = secrets.token_urlsafe(32)
+        expires = time.time() + app.permanent_session_lifetime.total_seconds()
+        self.store.save(session.sid, serializer.dumps(dict(session)), expires)
+        response.set_cookie(
+            name,
+            session.sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
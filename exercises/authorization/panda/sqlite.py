@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+PandAuth SQLite stores shared by worker processes
+
+@author:
+@version: 2025.12
+"""
+
+import pathlib
+import sqlite3
+import threading
+
+
+class Connections:
+    """
+    One connection per thread to a SQLite database
+
+    Connections use write-ahead logging, so that readers do not wait for writers,
+    and wait up to `busy_timeout` milliseconds for each other's locks.
+
+    :param path: database file
+    :param busy_timeout: milliseconds to wait for a lock
+    :param isolation_level: as in `sqlite3.connect`, None to manage transactions explicitly
+    """
+
+    def __init__(self, path: pathlib.Path, busy_timeout: int = 5000, isolation_level: str | None = ""):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.isolation_level = isolation_level
+        self._local = threading.local()
+
+    def get(self) -> sqlite3.Connection:
+        """Get the connection of the current thread, opening it on first use"""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.busy_timeout / 1000, isolation_level=self.isolation_level
+            )
+            connection.execute("pragma journal_mode=WAL;")
+            connection.execute("pragma synchronous=NORMAL;")
+            self._local.connection = connection
+        return connection
+
+
+class Sweeper:
+    """
+    Bounded deletion of the rows of a table whose time `column` has passed
+
+    A sweep deletes at most `batch` rows, so that it never holds the write lock for long,
+    and is due again after `interval` seconds, or right away while there is a backlog.
+    Only one thread sweeps at a time, the others skip it.
+
+    :param table: table to sweep
+    :param column: indexed column holding the time after which a row may be deleted
+    :param interval: seconds between sweeps
+    :param batch: maximum number of rows deleted by a sweep
+    """
+
+    def __init__(self, table: str, column: str, interval: float = 60, batch: int = 500):
+        self.table = table
+        self.column = column
+        self.interval = interval
+        self.batch = batch
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def is_due(self, now: float) -> bool:
+        return now >= self._next
+
+    def sweep(self, connection: sqlite3.Connection, now: float) -> int:
+        """Delete a batch of rows past their time, returns the number of deleted rows
+
+        Commits only if the connection does, so it can be part of a larger transaction.
+
+        :param connection: connection to delete with
+        :param now: current time, as a Unix timestamp
+        """
+        if not self._lock.acquire(blocking=False):
+            return 0
+        try:
+            deleted = connection.execute(
+                f"delete from {self.table} where rowid in "
+                f"(select rowid from {self.table} where {self.column}<=? order by {self.column} limit ?);",
+                (now, self.batch),
+            ).rowcount
+            self._next = now + (0 if deleted == self.batch else self.interval)
+            return deleted
+        finally:
+            self._lock.release()
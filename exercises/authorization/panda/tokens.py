@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+PandAuth ID token verification
+
+@author:
+@version: 2025.12
+"""
+
+import logging
+import re
+import threading
+import time
+
+import jwt
+import requests
+
+MAX_AGE = re.compile(r"max-age=(\d+)")
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidToken(ValueError):
+    """The ID token is malformed, forged, expired, or meant for someone else"""
+
+
+class KeySet:
+    """
+    Provider signing keys, cached per keys location
+
+    Keys are kept for as long as the provider allows with `Cache-Control: max-age`, or `ttl` seconds.
+    A token signed with a key that is not in the set makes the keys be fetched again, at most once
+    every `min_refresh` seconds, so that rotated keys are picked up and forged key ids cannot flood the provider.
+    Keys are fetched by one thread at a time, outside the cache lock, so cached keys never wait on the network.
+    """
+
+    def __init__(self, session: requests.Session, ttl: float = 3600, min_refresh: float = 60, timeout: float = 5):
+        self.session = session
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.timeout = timeout
+        self._keys: dict[str, tuple[dict[str, jwt.PyJWK], float, float]] = {}
+        self._lock = threading.Lock()
+        self._fetching = threading.Lock()
+
+    def key(self, uri: str, kid: str) -> jwt.PyJWK:
+        """Get a public key of the provider
+
+        :param uri: location of the provider keys, `jwks_uri` in the discovery document
+        :param kid: key id from the token header
+        :raises InvalidToken: the provider has no such key
+        :raises requests.RequestException: the keys could not be fetched
+        """
+        keys, stale = self._cached(uri, kid)
+        if stale:
+            with self._fetching:
+                # Another thread may have fetched the keys while this one waited
+                keys, stale = self._cached(uri, kid)
+                if stale:
+                    now = time.time()
+                    keys, max_age = self._fetch(uri)
+                    with self._lock:
+                        self._keys[uri] = (keys, now, now + max_age)
+        if kid not in keys:
+            raise InvalidToken(f"Unknown signing key {kid}")
+        return keys[kid]
+
+    def _cached(self, uri: str, kid: str) -> tuple[dict[str, jwt.PyJWK], bool]:
+        with self._lock:
+            keys, fetched, expires = self._keys.get(uri, ({}, 0.0, 0.0))
+        now = time.time()
+        return keys, now >= expires or (kid not in keys and now - fetched >= self.min_refresh)
+
+    def _fetch(self, uri: str) -> tuple[dict[str, jwt.PyJWK], float]:
+        response = self.session.get(uri, timeout=self.timeout)
+        response.raise_for_status()
+        keys = {}
+        for key in response.json().get("keys", []):
+            if key.get("kty") == "RSA" and key.get("use", "sig") == "sig" and "kid" in key:
+                try:
+                    keys[key["kid"]] = jwt.PyJWK(key, algorithm="RS256")
+                except jwt.PyJWKError:
+                    logger.warning("Skipped unusable signing key %s from %s", key["kid"], uri)
+        max_age = MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        logger.info("Fetched %d signing keys from %s", len(keys), uri)
+        return keys, float(max_age.group(1)) if max_age else self.ttl
+
+
+def verify_id_token(
+    token: str,
+    keys: KeySet,
+    jwks_uri: str,
+    issuer: str,
+    audience: str,
+    leeway: float = 60,
+) -> dict:
+    """Check the signature and the claims of an ID token
+
+    :param token: compact serialized JWT
+    :param keys: provider keys
+    :param jwks_uri: location of the provider keys
+    :param issuer: expected issuer, with or without the `https://` scheme
+    :param audience: expected audience, i.e. the client id
+    :param leeway: clock skew to tolerate, in seconds
+    :return: the token claims
+    :raises InvalidToken: the token must not be trusted
+    :raises requests.RequestException: the keys could not be fetched
+    """
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+    except jwt.InvalidTokenError as error:
+        raise InvalidToken("Malformed token") from error
+    key = keys.key(jwks_uri, str(kid))
+    # Google issues tokens as both accounts.google.com and https://accounts.google.com
+    bare_issuer = issuer.removeprefix("https://")
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=["RS256"],
+            audience=audience,
+            issuer=(bare_issuer, f"https://{bare_issuer}"),
+            leeway=leeway,
+            options={"require": ["exp"]},
+        )
+    except jwt.InvalidSignatureError as error:
+        raise InvalidToken("Invalid signature") from error
+    except jwt.InvalidTokenError as error:
+        raise InvalidToken(str(error)) from error
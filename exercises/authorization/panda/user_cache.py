@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+PandAuth user cache
+
+@author:
+@version: 2025.12
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+
+class UserCache:
+    """
+    Bounded LRU cache of user snapshots that expire after `ttl` seconds
+
+    Snapshots are plain dictionaries of column values, detached from any database session,
+    so they can be shared between threads. A size of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.query_ms = 0.0
+        self._users: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def get(self, user_id: str, load: Callable[[str], dict | None]) -> dict | None:
+        """Get a user snapshot, loading it on a miss
+
+        Missing users are not cached, so a user can log in right after a failed lookup.
+
+        :param user_id: user id
+        :param load: function returning the snapshot from the database, None if there is no such user
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+        start = time.perf_counter()
+        snapshot = load(user_id)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.misses += 1
+            self.query_ms += elapsed_ms
+            if snapshot is not None and self.maxsize > 0:
+                self._users[user_id] = (now + self.ttl, snapshot)
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.maxsize:
+                    self._users.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget a user, e.g. after the profile has changed"""
+        with self._lock:
+            self._users.pop(user_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._users.clear()
+
+    def stats(self) -> dict:
+        """Get the hit ratio and the query time saved by the hits, estimated from the misses"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            average_ms = self.query_ms / self.misses if self.misses else 0.0
+            return {
+                "size": len(self._users),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "query_ms": self.query_ms,
+                "saved_ms": self.hits * average_ms,
+            }
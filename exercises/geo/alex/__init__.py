@@ -6,7 +6,9 @@ Geography app initialization
 @version: 2025.11
 """
 
+import logging
 import pathlib
+import time
 
 from flask import Flask
 
@@ -18,8 +20,15 @@ except ModuleNotFoundError:
 
 
 def create_app():
+    started = time.perf_counter()
+    from .api import api
+    from .caching import DatabaseVersion, ResponseCache, refresh_database_version
+    from .importer import import_data
+    from .pool import RETRIEVAL_MODES, ConnectionPool
+    from .profiling import QueryLog, slow_query_logger
+    from .retrieval import clear_cache
     from .routes import main
-    from .retrieval import get_data_from_db
+    from .schema import create_indexes, missing_indexes
 
     app = Flask(__name__)
     if pathlib.Path(".flaskenv").exists():
@@ -30,6 +39,14 @@ def create_app():
     if not app.config.get("SECRET_KEY"):
         app.config["SECRET_KEY"] = "geo-secret-key"
     app.config.setdefault("DB_FILE", "world.sqlite3")
+    app.config.setdefault("RESPONSE_CACHE_SIZE", 1024)
+    app.config.setdefault("SLOW_QUERY_MS", 100)
+    app.config.setdefault("CITY_PAGE_SIZE", 200)
+    app.config.setdefault("DEBUG_ENDPOINTS", app.debug)
+    app.config.setdefault("RETRIEVAL_MODE", "cache")
+    app.config.setdefault("POOL_SIZE", 8)
+    if app.config["RETRIEVAL_MODE"] not in RETRIEVAL_MODES:
+        raise ValueError(f"Retrieval mode must be one of {', '.join(RETRIEVAL_MODES)}")
     if __name__ == "alex":
         db_dir = "data"
     else:
@@ -38,25 +55,145 @@ def create_app():
     if not data_source.exists():
         raise FileNotFoundError("Database not found")
     app.config["DB_FILE"] = data_source
+    if missing := missing_indexes(data_source):
+        app.logger.warning(
+            "%s lacks the indexes %s, city pages will be slow until `flask create-indexes` is run",
+            data_source,
+            ", ".join(missing),
+        )
+    app.config["DB_VERSION"] = DatabaseVersion.of(data_source)
+    if app.config["RETRIEVAL_MODE"] in ("pool", "memory"):
+        app.config["connection_pool"] = ConnectionPool(
+            data_source, app.config["POOL_SIZE"], in_memory=app.config["RETRIEVAL_MODE"] == "memory"
+        )
+    app.config["response_cache"] = ResponseCache(app.config["RESPONSE_CACHE_SIZE"])
+    app.config["query_log"] = QueryLog(app.config["SLOW_QUERY_MS"])
+    if app.config.get("SLOW_QUERY_LOG") and not slow_query_logger.handlers:
+        slow_query_logger.addHandler(logging.FileHandler(app.config["SLOW_QUERY_LOG"]))
     app.register_blueprint(main)
+    app.register_blueprint(api)
+    app.cli.add_command(import_data)
+    app.cli.add_command(create_indexes)
     with app.app_context():
-        app.config["regions"] = [
+        from_snapshot = load_lookups(app)
+
+    @app.before_request
+    def reload_changed_database():
+        """Drop everything derived from the database once its file changes"""
+        if refresh_database_version(app):
+            clear_cache()
+            app.config["response_cache"].clear()
+            if (pool := app.config.get("connection_pool")) is not None:
+                app.config["connection_pool"] = ConnectionPool(pool.db_file, pool.size, pool.in_memory)
+                pool.close()
+            load_lookups(app)
+
+    app.config["STARTUP_MS"] = (time.perf_counter() - started) * 1000
+    app.logger.info(
+        "App created in %.1f ms with lookups from the %s",
+        app.config["STARTUP_MS"],
+        "snapshot" if from_snapshot else "database",
+    )
+    return app
+
+
+def load_lookups(app: Flask) -> bool:
+    """Install the lookups, taking their data from the database snapshot or saving it there if it is stale
+
+    The snapshot is keyed on the database contents hash, so every worker and every app instance
+    created for the same database shares the data queried once.
+    Returns True if the lookups came from the snapshot.
+    Must be called within the application context.
+
+    :param app: application to store the lookups in
+    """
+    from .snapshot import read_snapshot, write_snapshot
+
+    db_file = app.config["DB_FILE"]
+    digest = app.config["DB_VERSION"].digest
+    data = read_snapshot(db_file, digest)
+    from_snapshot = data is not None
+    if not from_snapshot:
+        data = query_lookups()
+        write_snapshot(db_file, digest, data)
+    lookups = build_lookups(data)
+    app.jinja_env.globals["select_options"] = lookups["select_options"]
+    app.config.update({key: value for key, value in lookups.items() if key != "select_options"})
+    return from_snapshot
+
+
+def query_lookups() -> dict:
+    """Query the data behind the lookup lists and indexes used by every page
+
+    The result is plain JSON-serializable data, so that it can be saved to the snapshot.
+    Must be called within the application context.
+    """
+    from .analytics import STORED_METRICS
+    from .retrieval import get_data_from_db
+
+    return {
+        "regions": [
             row["continental_region"]
             for row in get_data_from_db(
                 "select distinct continental_region from country where continental_region is not null order by continental_region;"
             )
             if row["continental_region"]
-        ]
-        app.config["subregions"] = [
+        ],
+        "subregions": [
             row["subregion"]
             for row in get_data_from_db(
                 "select distinct subregion from country where subregion is not null and subregion!='' order by subregion;"
             )
             if row["subregion"]
-        ]
-        app.config["countries"] = [
+        ],
+        "countries": [
             row["name"]
             for row in get_data_from_db("select name from country order by name;")
             if row["name"]
+        ],
+        "suggestions": [
+            [row["name"], "country", row["population_2023"], None]
+            for row in get_data_from_db("select name, population_2023 from country;")
         ]
-    return app
+        + [
+            [row["name"], "city", row["population"], row["country"]]
+            for row in get_data_from_db(
+                "select ci.name, ci.population, c.name as country from city as ci left join country as c on ci.country_code = c.code3;"
+            )
+        ],
+        "country_rows": [
+            dict(row)
+            for row in get_data_from_db(
+                f"select name, continental_region, subregion, {', '.join(STORED_METRICS)} from country order by name;"
+            )
+        ],
+    }
+
+
+def build_lookups(data: dict) -> dict:
+    """Build the lookup lists and indexes used by every page
+
+    :param data: lookup data from `query_lookups`
+    """
+    from .analytics import CountryColumns
+    from .fragments import SelectOptions
+    from .search import NameIndex, PrefixIndex, Suggestion
+
+    regions, subregions, countries = data["regions"], data["subregions"], data["countries"]
+    return {
+        "regions": regions,
+        "subregions": subregions,
+        "countries": countries,
+        "select_options": {
+            "countries": SelectOptions(countries),
+            "regions": SelectOptions(regions),
+            "subregions": SelectOptions(subregions),
+        },
+        "search_index": PrefixIndex(Suggestion(*suggestion) for suggestion in data["suggestions"]),
+        "name_index": {
+            "country": NameIndex(countries),
+            "region": NameIndex(regions),
+            "subregion": NameIndex(subregions),
+        },
+        "country_columns": CountryColumns(data["country_rows"]),
+    }
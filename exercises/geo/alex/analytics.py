@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Geography demographic and economic analytics
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+import operator
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+from itertools import compress, repeat
+
+YEARS = (2000, 2010, 2022, 2023)
+STORED_METRICS = (
+    "area",
+    "life_expectancy",
+    "life_expectancy_male",
+    "life_expectancy_female",
+    *(f"population_{year}" for year in YEARS),
+    *(f"gdp_{year}" for year in YEARS),
+)
+DERIVED_METRICS = tuple(f"gdp_per_capita_{year}" for year in YEARS) + ("density",)
+METRICS = STORED_METRICS + DERIVED_METRICS
+GROWTH_METRICS = ("population", "gdp", "gdp_per_capita")
+NAN = float("nan")
+
+
+def _ratio(numerator: array, denominator: array) -> array:
+    """Divide two columns element-wise, yielding NaN where the denominator is 0 or missing"""
+    safe = array("d", (NAN if value == 0 else value for value in denominator))
+    return array("d", map(operator.truediv, numerator, safe))
+
+
+class CountryColumns:
+    """
+    Column-oriented copy of the numeric country data
+
+    Every metric is a `array('d')` aligned with `names`, where missing values are NaN.
+    Computations map C-level operators over whole columns instead of querying the database,
+    and their results are cached per parameter set.
+    """
+
+    def __init__(self, rows: Iterable[Mapping]):
+        rows = list(rows)
+        self.names = tuple(row["name"] for row in rows)
+        self.regions = tuple(row["continental_region"] for row in rows)
+        self.subregions = tuple(row["subregion"] for row in rows)
+        self._columns = {
+            metric: array("d", (NAN if row[metric] is None else row[metric] for row in rows))
+            for metric in STORED_METRICS
+        }
+        for year in YEARS:
+            per_capita = _ratio(self._columns[f"gdp_{year}"], self._columns[f"population_{year}"])
+            self._columns[f"gdp_per_capita_{year}"] = array("d", map(operator.mul, per_capita, repeat(1e6)))
+        self._columns["density"] = _ratio(self._columns["population_2023"], self._columns["area"])
+        self._members: dict[str, tuple[int, ...]] = {}
+        for idx, (region, subregion) in enumerate(zip(self.regions, self.subregions)):
+            for name in {region, subregion} - {None, ""}:
+                self._members[name] = self._members.get(name, ()) + (idx,)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def column(self, metric: str) -> array:
+        """Get values of a metric for every country
+
+        :param metric: one of METRICS
+        :raises ValueError: the metric does not exist
+        """
+        if metric not in self._columns:
+            raise ValueError(f"Metric {metric} does not exist")
+        return self._columns[metric]
+
+    def members(self, region: str | None = None) -> tuple[int, ...]:
+        """Get positions of countries in a continental region or a subregion
+
+        :param region: region or subregion name, None for the whole world
+        :raises ValueError: the region does not exist
+        """
+        if region is None:
+            return tuple(range(len(self)))
+        if region not in self._members:
+            raise ValueError(f"Region {region} does not exist")
+        return self._members[region]
+
+    @lru_cache(maxsize=1024)
+    def top(self, metric: str, number: int = 10, region: str | None = None, ascending: bool = False):
+        """Rank countries by a metric
+
+        :param metric: one of METRICS
+        :param number: number of countries to return
+        :param region: region or subregion to rank within, None for the whole world
+        :param ascending: return the lowest values instead of the highest
+        """
+        return self._rank(self.column(metric), number, region, ascending)
+
+    @lru_cache(maxsize=1024)
+    def growth(
+        self,
+        metric: str,
+        start: int,
+        end: int,
+        number: int = 10,
+        region: str | None = None,
+        ascending: bool = False,
+    ):
+        """Rank countries by compound annual growth rate of a metric between two years
+
+        :param metric: one of GROWTH_METRICS
+        :param start: first year
+        :param end: last year, after the first one
+        :param number: number of countries to return
+        :param region: region or subregion to rank within, None for the whole world
+        :param ascending: return the slowest growth instead of the fastest
+        :raises ValueError: the metric or the years do not exist
+        """
+        if metric not in GROWTH_METRICS:
+            raise ValueError(f"Metric {metric} does not exist")
+        if start not in YEARS or end not in YEARS or start >= end:
+            raise ValueError(f"Years must be two of {', '.join(map(str, YEARS))} in increasing order")
+        ratio = _ratio(self.column(f"{metric}_{end}"), self.column(f"{metric}_{start}"))
+        rate = map(operator.sub, map(pow, ratio, repeat(1 / (end - start))), repeat(1.0))
+        return self._rank(array("d", rate), number, region, ascending)
+
+    @lru_cache(maxsize=1024)
+    def percentiles(self, metric: str, region: str | None = None):
+        """Percentile rank of every country within a region
+
+        Percentile rank is the share of values below a country's value, counting ties as half.
+        Countries with missing values are listed without a rank.
+
+        :param metric: one of METRICS
+        :param region: region or subregion, None for the whole world
+        """
+        column = self.column(metric)
+        positions = self.members(region)
+        values = array("d", map(column.__getitem__, positions))
+        known = sorted(compress(values, map(operator.not_, map(math.isnan, values))))
+        count = len(known)
+        below = map(bisect_left, repeat(known), values)
+        not_above = map(bisect_right, repeat(known), values)
+        ranks = (
+            None if math.isnan(value) else 100 * (low + (high - low) / 2) / count
+            for value, low, high in zip(values, below, not_above)
+        )
+        return tuple(
+            (self.names[idx], _value(value), rank) for idx, value, rank in zip(positions, values, ranks)
+        )
+
+    def _rank(self, column: array, number: int, region: str | None, ascending: bool):
+        positions = compress(range(len(column)), map(operator.not_, map(math.isnan, column)))
+        if region is not None:
+            positions = filter(frozenset(self.members(region)).__contains__, positions)
+        select = heapq.nsmallest if ascending else heapq.nlargest
+        best = select(number, positions, key=column.__getitem__)
+        return tuple((self.names[idx], column[idx]) for idx in best)
+
+
+def _value(value: float) -> float | None:
+    return None if math.isnan(value) else value
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Geography JSON API
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Literal
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request
+from werkzeug.exceptions import NotFound
+
+from .analytics import METRICS
+from .retrieval import compare_countries, get_data_from_db, stream_data_from_db
+
+api = Blueprint("api", __name__, url_prefix="/api/v1")
+
+COUNTRY_SUMMARY_QUERY = """
+    select
+        c.name,
+        c.official_name,
+        c.code2,
+        c.code3,
+        c.continental_region,
+        c.subregion,
+        c.area,
+        c.population_2023,
+        c.government_system,
+        ci.name as capital_name
+    from country as c
+    left join city as ci on c.capital = ci.id
+"""
+MAX_SUGGESTIONS = 50
+MAX_RANKED = 250
+CITY_COLUMNS = ("id", "name", "country_code", "admin_region", "population")
+CITY_EXPORT_QUERY = "select id, name, country_code, admin_region, population from city order by id;"
+
+
+@api.get("/countries")
+def get_countries() -> Response:
+    """Get all countries and territories"""
+    records = get_data_from_db(COUNTRY_SUMMARY_QUERY + " order by c.name;")
+    return jsonify({"countries": [dict(row) for row in records]})
+
+
+def known_name(kind: str, name: str) -> str:
+    """Reject names that are not in the lookups built at startup, so that they never reach the query cache
+
+    :param kind: country|region|subregion
+    :param name: exact name as requested
+    :raises NotFound: there is no such name
+    """
+    if current_app.config["name_index"][kind].resolve(name) != name:
+        abort(404, description=f"{kind.capitalize()} '{name}' was not found.")
+    return name
+
+
+@api.get("/countries/<string:name>")
+def get_country(name: str) -> Response:
+    """Get a specific country
+
+    :param name: country name
+    """
+    known_name("country", name)
+    records = get_data_from_db("select * from country where name=?;", (name,))
+    if not records:
+        abort(404, description=f"Country '{name}' was not found.")
+    return jsonify({"country": dict(records[0])})
+
+
+@api.get("/countries/<string:name>/cities")
+def get_country_cities(name: str) -> Response:
+    """Get cities of a specific country
+
+    :param name: country name
+    """
+    known_name("country", name)
+    records = get_data_from_db("select code3 from country where name=?;", (name,))
+    if not records:
+        abort(404, description=f"Country '{name}' was not found.")
+    cities = get_data_from_db(
+        "select id, name, country_code, admin_region, population from city where country_code=? order by name;",
+        (records[0]["code3"],),
+    )
+    return jsonify({"country": name, "cities": [dict(row) for row in cities]})
+
+
+@api.get("/regions")
+def get_regions() -> Response:
+    """Get all continental regions"""
+    return jsonify({"regions": current_app.config["regions"]})
+
+
+@api.get("/regions/<string:name>")
+def get_region(name: str) -> Response:
+    """Get countries of a specific continental region
+
+    :param name: region name
+    """
+    known_name("region", name)
+    records = get_data_from_db(COUNTRY_SUMMARY_QUERY + " where c.continental_region=? order by c.name;", (name,))
+    if not records:
+        abort(404, description=f"Region '{name}' was not found.")
+    return jsonify({"region": name, "countries": [dict(row) for row in records]})
+
+
+@api.get("/subregions")
+def get_subregions() -> Response:
+    """Get all subregions"""
+    return jsonify({"subregions": current_app.config["subregions"]})
+
+
+@api.get("/subregions/<string:name>")
+def get_subregion(name: str) -> Response:
+    """Get countries of a specific subregion
+
+    :param name: subregion name
+    """
+    known_name("subregion", name)
+    records = get_data_from_db(COUNTRY_SUMMARY_QUERY + " where c.subregion=? order by c.name;", (name,))
+    if not records:
+        abort(404, description=f"Subregion '{name}' was not found.")
+    return jsonify({"subregion": name, "countries": [dict(row) for row in records]})
+
+
+@api.get("/compare")
+def compare() -> Response:
+    """Get several countries with their capitals, reporting the ones that were not found"""
+    names = request.args.getlist("names")
+    if not names:
+        abort(404, description="No countries to compare, use ?names=")
+    try:
+        comparison = compare_countries(names)
+    except ValueError as error:
+        abort(404, description=str(error))
+    return jsonify(
+        {
+            "countries": [
+                {"name": name, "country": country}
+                if country is not None
+                else {"name": name, "country": None, "error": f"Country '{name}' was not found."}
+                for name, country in comparison
+            ]
+        }
+    )
+
+
+@api.get("/autocomplete")
+def autocomplete() -> Response:
+    """Suggest countries and cities by name prefix
+
+    Matching is case- and accent-insensitive and the most populous places come first.
+    """
+    prefix = request.args.get("q", "")
+    limit = request.args.get("limit", 10, type=int)
+    kind = request.args.get("kind")
+    if kind not in {None, "country", "city"}:
+        abort(404, description=f"Kind '{kind}' does not exist, try 'country' or 'city'.")
+    limit = max(0, min(limit, MAX_SUGGESTIONS))
+    suggestions = current_app.config["search_index"].lookup(prefix, limit, kind)
+    return jsonify({"query": prefix, "suggestions": suggestions})
+
+
+@api.get("/analytics/metrics")
+def get_metrics() -> Response:
+    """Get names of metrics available for analytics"""
+    return jsonify({"metrics": METRICS})
+
+
+@api.get("/analytics/top/<string:metric>")
+def get_top(metric: str) -> Response:
+    """Rank countries by a metric, e.g. `gdp_per_capita_2023`
+
+    :param metric: metric to rank by
+    """
+    number, region, ascending = _ranking_args()
+    try:
+        ranked = current_app.config["country_columns"].top(metric, number, region, ascending)
+    except ValueError as error:
+        abort(404, description=str(error))
+    return jsonify({"metric": metric, "region": region, "countries": _ranked(ranked)})
+
+
+@api.get("/analytics/growth/<string:metric>/<int:start>/<int:end>")
+def get_growth(metric: str, start: int, end: int) -> Response:
+    """Rank countries by compound annual growth rate between two census years
+
+    :param metric: population, gdp, or gdp_per_capita
+    :param start: first year
+    :param end: last year
+    """
+    number, region, ascending = _ranking_args()
+    try:
+        ranked = current_app.config["country_columns"].growth(metric, start, end, number, region, ascending)
+    except ValueError as error:
+        abort(404, description=str(error))
+    return jsonify({"metric": metric, "start": start, "end": end, "region": region, "countries": _ranked(ranked)})
+
+
+@api.get("/analytics/percentiles/<string:metric>")
+def get_percentiles(metric: str) -> Response:
+    """Percentile rank of every country within a region or subregion
+
+    :param metric: metric to rank by
+    """
+    region = request.args.get("region")
+    try:
+        ranked = current_app.config["country_columns"].percentiles(metric, region)
+    except ValueError as error:
+        abort(404, description=str(error))
+    return jsonify(
+        {
+            "metric": metric,
+            "region": region,
+            "countries": [{"name": name, "value": value, "percentile": rank} for name, value, rank in ranked],
+        }
+    )
+
+
+def _ranking_args() -> tuple[int, str | None, bool]:
+    number = max(0, min(request.args.get("n", 10, type=int), MAX_RANKED))
+    return number, request.args.get("region"), request.args.get("order", "desc") == "asc"
+
+
+def _ranked(ranked) -> list[dict]:
+    return [{"rank": position, "name": name, "value": value} for position, (name, value) in enumerate(ranked, 1)]
+
+
+@api.get("/debug/queries")
+def get_query_stats() -> Response:
+    """Per-query timings and recent slow queries
+
+    Only available when `DEBUG_ENDPOINTS` is enabled, which it is in debug mode.
+    """
+    if not current_app.config["DEBUG_ENDPOINTS"]:
+        abort(404, description="Debug endpoints are disabled.")
+    return jsonify(current_app.config["query_log"].report())
+
+
+@api.get("/export/cities.ndjson")
+def export_cities_ndjson() -> Response:
+    """Stream every city as newline-delimited JSON"""
+    rows = stream_data_from_db(CITY_EXPORT_QUERY)
+    lines = (json.dumps(dict(row), ensure_ascii=False) + "\n" for row in rows)
+    return Response(
+        lines,
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=cities.ndjson"},
+    )
+
+
+@api.get("/export/cities.csv")
+def export_cities_csv() -> Response:
+    """Stream every city as CSV"""
+    rows = stream_data_from_db(CITY_EXPORT_QUERY)
+    return Response(
+        _csv_lines(rows),
+        mimetype="text/csv",
+        headers={"Content-Disposition": "attachment; filename=cities.csv"},
+    )
+
+
+def _csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CITY_COLUMNS)
+    for row in rows:
+        writer.writerow(tuple(row))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+@api.errorhandler(404)
+def not_found(error: NotFound) -> tuple[Response, Literal[404]]:
+    return jsonify({"error": error.description}), 404
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Geography response caching
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from flask import Flask, Response
+
+UNCACHED_HEADERS = {"set-cookie", "vary", "date"}
+
+
+@dataclass(frozen=True)
+class DatabaseVersion:
+    """
+    Identity of the database file contents
+
+    :param mtime_ns: modification time in nanoseconds
+    :param size: file size in bytes
+    :param digest: SHA-256 of the file contents
+    """
+
+    mtime_ns: int
+    size: int
+    digest: str
+
+    @classmethod
+    def of(cls, db_file: str | os.PathLike) -> DatabaseVersion:
+        """Fingerprint a database file
+
+        :param db_file: path to the database
+        """
+        stat = os.stat(db_file)
+        digest = hashlib.sha256()
+        with open(db_file, "rb") as data:
+            while chunk := data.read(1 << 20):
+                digest.update(chunk)
+        return cls(stat.st_mtime_ns, stat.st_size, digest.hexdigest())
+
+    @property
+    def last_modified(self) -> datetime.datetime:
+        return datetime.datetime.fromtimestamp(self.mtime_ns // 1_000_000_000, tz=datetime.timezone.utc)
+
+    def is_current(self, db_file: str | os.PathLike) -> bool:
+        """Check whether the file is (most likely) unchanged without reading it
+
+        :param db_file: path to the database
+        """
+        stat = os.stat(db_file)
+        return (stat.st_mtime_ns, stat.st_size) == (self.mtime_ns, self.size)
+
+    def etag(self, path: str, query_string: bytes) -> str:
+        """Validator of a page at a specific database version
+
+        :param path: requested path
+        :param query_string: raw query string
+        """
+        page = hashlib.sha256(self.digest.encode())
+        page.update(path.encode())
+        page.update(b"?" + query_string)
+        return page.hexdigest()[:32]
+
+
+@dataclass(frozen=True)
+class CachedPage:
+    """
+    Rendered response that can be replayed
+
+    :param status: HTTP status code
+    :param headers: response headers without per-client ones
+    :param body: response body
+    """
+
+    status: int
+    headers: tuple[tuple[str, str], ...]
+    body: bytes
+
+    @classmethod
+    def from_response(cls, response: Response) -> CachedPage:
+        headers = tuple((key, value) for key, value in response.headers.items() if key.lower() not in UNCACHED_HEADERS)
+        return cls(response.status_code, headers, response.get_data())
+
+    def to_response(self, response_class: type[Response]) -> Response:
+        return response_class(self.body, status=self.status, headers=list(self.headers))
+
+
+class ResponseCache:
+    """
+    Bounded LRU cache of rendered pages
+
+    A size of 0 disables caching.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._pages: OrderedDict[tuple[str, bytes], CachedPage] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def get(self, key: tuple[str, bytes]) -> CachedPage | None:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is not None:
+                self._pages.move_to_end(key)
+            return page
+
+    def put(self, key: tuple[str, bytes], page: CachedPage) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._pages[key] = page
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.maxsize:
+                self._pages.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pages.clear()
+
+
+_refresh_lock = threading.Lock()
+
+
+def refresh_database_version(app: Flask) -> bool:
+    """Re-fingerprint the database if its file has changed
+
+    Returns True if the contents are different, so that everything derived from them must be dropped.
+
+    :param app: application whose `DB_VERSION` to update
+    """
+    db_file = app.config["DB_FILE"]
+    if app.config["DB_VERSION"].is_current(db_file):
+        return False
+    with _refresh_lock:
+        previous = app.config["DB_VERSION"]
+        if previous.is_current(db_file):
+            return False
+        app.config["DB_VERSION"] = DatabaseVersion.of(db_file)
+        return app.config["DB_VERSION"].digest != previous.digest
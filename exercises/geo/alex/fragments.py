@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Geography pre-rendered HTML fragments
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+from markupsafe import Markup
+
+OPTION = Markup('<option value="{0}">{0}</option>')
+SELECTED_OPTION = Markup('<option value="{0}" selected>{0}</option>')
+
+
+class SelectOptions:
+    """
+    Options of a search form select rendered once
+
+    The markup of every option is built at startup,
+    and rendering a page only patches the `selected` attribute into the chosen option.
+    """
+
+    def __init__(self, values: Iterable[str]):
+        self._options = {value: OPTION.format(value) for value in values}
+        self._html = Markup("\n").join(self._options.values())
+
+    def __len__(self) -> int:
+        return len(self._options)
+
+    def __html__(self) -> str:
+        return self._html
+
+    def render(self, selected: str | None = None) -> Markup:
+        """Get the options markup with one of the options selected
+
+        :param selected: value of the selected option
+        """
+        if selected not in self._options:
+            return self._html
+        return Markup(self._html.replace(self._options[selected], SELECTED_OPTION.format(selected), 1))
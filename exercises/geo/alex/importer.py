@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Geography bulk data import
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import csv
+import itertools
+import json
+import os
+import pathlib
+import sqlite3
+import time
+from collections.abc import Iterable, Iterator
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from .schema import INDEXES
+
+TABLES = ("country", "city")
+
+
+def read_records(source: pathlib.Path) -> Iterator[dict]:
+    """Read records from a CSV, JSON Lines, or JSON file
+
+    CSV and JSON Lines files are read one line at a time, so they can be of any size.
+    A JSON file must hold a single array of objects and is loaded whole.
+
+    :param source: file to read
+    :raises click.BadParameter: the file format is not supported
+    """
+    suffix = source.suffix.lower()
+    if suffix == ".csv":
+        with source.open(newline="", encoding="utf-8") as data:
+            for row in csv.DictReader(data):
+                yield {key: (value if value != "" else None) for key, value in row.items()}
+    elif suffix in (".ndjson", ".jsonl"):
+        with source.open(encoding="utf-8") as data:
+            for line in data:
+                if line.strip():
+                    yield json.loads(line)
+    elif suffix == ".json":
+        with source.open(encoding="utf-8") as data:
+            yield from json.load(data)
+    else:
+        raise click.BadParameter(f"{source.name} is not a .csv, .ndjson, .jsonl, or .json file")
+
+
+def load_table(
+    connection: sqlite3.Connection, table: str, records: Iterable[dict], batch_size: int
+) -> int:
+    """Insert or replace records in batches, one transaction per batch
+
+    :param connection: connection to the database being built
+    :param table: country|city
+    :param records: rows keyed by column name, missing columns are NULL
+    :param batch_size: number of rows per `executemany` and transaction
+    """
+    columns = [row[1] for row in connection.execute(f"pragma table_info({table});")]
+    statement = (
+        f"insert or replace into {table} ({', '.join(columns)}) values ({', '.join('?' * len(columns))});"
+    )
+    rows = (tuple(record.get(column) for column in columns) for record in records)
+    total = 0
+    while batch := list(itertools.islice(rows, batch_size)):
+        with connection:
+            connection.executemany(statement, batch)
+        total += len(batch)
+    return total
+
+
+@click.command("import-data")
+@click.option("--countries", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--cities", type=click.Path(exists=True, dir_okay=False, path_type=pathlib.Path))
+@click.option("--replace", is_flag=True, help="Drop existing rows of the imported tables first.")
+@click.option(
+    "--batch-size", type=click.IntRange(min=1), default=50_000, show_default=True, help="Rows per transaction."
+)
+@with_appcontext
+def import_data(countries: pathlib.Path | None, cities: pathlib.Path | None, replace: bool, batch_size: int):
+    """Bulk-load countries and cities into the database.
+
+    The data is loaded into a copy of the database with indexes dropped and
+    durability relaxed, the indexes are rebuilt, and the copy atomically
+    replaces the original so that running workers pick it up on their next request.
+    The copy keeps every table, view, index, and trigger of the original,
+    with indexes and triggers created after the data.
+    """
+    if countries is None and cities is None:
+        raise click.UsageError("Nothing to import, use --countries and/or --cities.")
+    target = pathlib.Path(current_app.config["DB_FILE"])
+    staging = target.with_name(f"{target.name}.importing")
+    staged = (staging, staging.with_name(f"{staging.name}-wal"), staging.with_name(f"{staging.name}-shm"))
+    for leftover in staged:
+        leftover.unlink(missing_ok=True)
+
+    connection = sqlite3.connect(staging)
+    try:
+        connection.execute("pragma journal_mode=WAL;")
+        connection.execute("pragma synchronous=OFF;")
+        connection.execute("attach database ? as source;", (str(target),))
+        sources = {table: path for table, path in zip(TABLES, (countries, cities)) if path is not None}
+        schema = connection.execute(
+            "select type, name, sql from source.sqlite_master where sql is not null and name not like 'sqlite_%' "
+            "order by type!='table', rowid;"
+        ).fetchall()
+        with connection:
+            for kind, _, sql in schema:
+                if kind in ("table", "view"):
+                    connection.execute(sql)
+            for kind, table, _ in schema:
+                if kind == "table" and not (replace and table in sources):
+                    connection.execute(f'insert into main."{table}" select * from source."{table}";')
+        connection.execute("detach database source;")
+
+        for table, path in sources.items():
+            start = time.perf_counter()
+            loaded = load_table(connection, table, read_records(path), batch_size)
+            elapsed = time.perf_counter() - start
+            click.echo(f"{table}: {loaded:,} rows in {elapsed:.2f} s ({loaded / max(elapsed, 1e-9):,.0f} rows/s)")
+
+        start = time.perf_counter()
+        with connection:
+            for kind, _, sql in schema:
+                if kind in ("index", "trigger"):
+                    connection.execute(sql)
+            for statement in INDEXES:
+                connection.execute(statement)
+        click.echo(f"indexes: built in {time.perf_counter() - start:.2f} s")
+        connection.execute("pragma journal_mode=DELETE;")
+    except BaseException:
+        connection.close()
+        for leftover in staged:
+            leftover.unlink(missing_ok=True)
+        raise
+    connection.close()
+    os.replace(staging, target)
+    click.echo(f"Replaced {target}")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Geography database connection pool
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import os
+import queue
+import sqlite3
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+RETRIEVAL_MODES = ("cache", "nocache", "pool", "memory")
+
+
+def connect(db_file: str | os.PathLike, in_memory: bool = False) -> sqlite3.Connection:
+    """Open a read connection that can be shared between threads, one at a time
+
+    :param db_file: path to the database
+    :param in_memory: copy the whole database into memory
+    """
+    if not in_memory:
+        connection = sqlite3.connect(db_file, check_same_thread=False)
+    else:
+        connection = sqlite3.connect(":memory:", check_same_thread=False)
+        source = sqlite3.connect(db_file)
+        try:
+            source.backup(connection)
+        finally:
+            source.close()
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of open connections
+
+    Connections are opened lazily and handed out most recently used first.
+    Callers block while all of them are in use.
+    """
+
+    def __init__(self, db_file: str | os.PathLike, size: int = 8, in_memory: bool = False):
+        self.db_file = db_file
+        self.size = size
+        self.in_memory = in_memory
+        self._idle: queue.LifoQueue[sqlite3.Connection | None] = queue.LifoQueue()
+        for _ in range(size):
+            self._idle.put(None)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection for the duration of a `with` block"""
+        connection = self._idle.get()
+        if connection is None:
+            try:
+                connection = connect(self.db_file, self.in_memory)
+            except BaseException:
+                self._idle.put(None)
+                raise
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        """Close idle connections, the ones in use are closed when the pool is garbage collected"""
+        for _ in range(self.size):
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if connection is not None:
+                connection.close()
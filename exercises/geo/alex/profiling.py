@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Geography query profiling
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass
+
+slow_query_logger = logging.getLogger("alex.slow_queries")
+
+
+@dataclass
+class QueryStats:
+    """
+    Aggregated timings of a single query text
+
+    :param calls: number of times the query was requested
+    :param misses: number of times the query was executed, i.e. not served from the cache
+    :param rows: number of rows returned by the executions
+    :param total_ms: time spent answering all calls, cached or not
+    :param db_ms: time spent executing the query in SQLite
+    :param max_db_ms: slowest execution
+    """
+
+    calls: int = 0
+    misses: int = 0
+    rows: int = 0
+    total_ms: float = 0.0
+    db_ms: float = 0.0
+    max_db_ms: float = 0.0
+
+    @property
+    def hits(self) -> int:
+        return self.calls - self.misses
+
+
+class QueryLog:
+    """
+    Per-query statistics and the most recent slow queries
+
+    Query texts are compared with whitespace collapsed,
+    so the same query written on one or several lines is counted once.
+    """
+
+    def __init__(self, slow_ms: float = 100.0, keep: int = 100):
+        self.slow_ms = slow_ms
+        self._stats: dict[str, QueryStats] = {}
+        self._slow: deque[dict] = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    def record_call(self, query: str, elapsed_ms: float) -> None:
+        """Account for a request of a query, whether cached or not
+
+        :param query: query text
+        :param elapsed_ms: time to answer the request
+        """
+        with self._lock:
+            stats = self._stats.setdefault(self.normalize(query), QueryStats())
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+
+    def record_execution(self, query: str, params: tuple, elapsed_ms: float, rows: int, plan=None) -> None:
+        """Account for an execution of a query in the database
+
+        :param query: query text
+        :param params: query parameters
+        :param elapsed_ms: execution time
+        :param rows: number of rows returned
+        :param plan: rows of `EXPLAIN QUERY PLAN` of a slow query
+        """
+        text = self.normalize(query)
+        with self._lock:
+            stats = self._stats.setdefault(text, QueryStats())
+            stats.misses += 1
+            stats.rows += rows
+            stats.db_ms += elapsed_ms
+            stats.max_db_ms = max(stats.max_db_ms, elapsed_ms)
+            if plan is not None:
+                self._slow.append(
+                    {"query": text, "params": list(params), "ms": elapsed_ms, "rows": rows, "plan": plan}
+                )
+        if plan is not None:
+            slow_query_logger.warning(
+                "%.1f ms, %d rows: %s %r\n%s", elapsed_ms, rows, text, params, "\n".join(plan)
+            )
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return elapsed_ms >= self.slow_ms
+
+    def report(self) -> dict:
+        """Get all statistics, slowest queries first"""
+        with self._lock:
+            queries = [
+                {"query": text, "hits": stats.hits, **asdict(stats)}
+                for text, stats in sorted(self._stats.items(), key=lambda item: item[1].db_ms, reverse=True)
+            ]
+            return {"slow_ms": self.slow_ms, "queries": queries, "slow_queries": list(self._slow)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
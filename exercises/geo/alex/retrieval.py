@@ -8,24 +8,375 @@ Geography query data retrieval
 
 from __future__ import annotations
 
+import base64
+import json
+from collections.abc import Iterator
+from dataclasses import dataclass
 from functools import cache
 import sqlite3
+import threading
+import time
 
 from flask import current_app
 
 
-@cache
-def get_data_from_db(query: str, params: tuple | None = None) -> list:
+def get_data_from_db(query: str, params: tuple | None = None, cached: bool = True) -> list:
     """Retrieve data from the database
 
+    How a query reaches the database depends on the `RETRIEVAL_MODE` setting:
+    `cache` caches results per database file and contents, query, and parameters,
+    `nocache` opens a new connection for every query,
+    and `pool` and `memory` borrow a connection from the application's pool.
+    Every call is timed in the application's query log.
+
     :param query: parametrized query to execute
     :param params: query parameters
+    :param cached: cache the result in the `cache` mode, disable for queries with unbounded parameter sets
     """
+    start = time.perf_counter()
     params = params or tuple()
-    connection = sqlite3.connect(current_app.config["DB_FILE"])
+    pool = current_app.config.get("connection_pool")
+    if pool is not None:
+        with pool.connection() as connection:
+            records = _execute(connection, query, params)
+    elif not cached or current_app.config.get("RETRIEVAL_MODE", "cache") == "nocache":
+        records = _fetch_all.__wrapped__(current_app.config["DB_FILE"], None, query, params)
+    else:
+        records = _fetch_all(current_app.config["DB_FILE"], current_app.config["DB_VERSION"].digest, query, params)
+    current_app.config["query_log"].record_call(query, (time.perf_counter() - start) * 1000)
+    return records
+
+
+@cache
+def _fetch_all(db_file, digest: str | None, query: str, params: tuple) -> list:
+    connection = sqlite3.connect(db_file)
+    connection.row_factory = sqlite3.Row
+    try:
+        return _execute(connection, query, params)
+    finally:
+        connection.close()
+
+
+def _execute(connection: sqlite3.Connection, query: str, params: tuple) -> list:
+    query_log = current_app.config["query_log"]
+    start = time.perf_counter()
+    records = connection.execute(query, params).fetchall()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    plan = None
+    if query_log.is_slow(elapsed_ms):
+        plan = [row["detail"] for row in connection.execute(f"explain query plan {query}", params)]
+    query_log.record_execution(query, params, elapsed_ms, len(records), plan)
+    return records
+
+
+CITY_ORDERS = {
+    "name": ("ci.name, ci.id", "ci.name"),
+    "population": ("ifnull(ci.population, -1) desc, ci.id", "ifnull(ci.population, -1)"),
+}
+COUNTRY_DOCUMENT_QUERY = """
+    select
+        c.name,
+        c.code3,
+        c.capital,
+        c.continental_region,
+        c.subregion,
+        (
+            select count(*)
+            from city as cc
+            join country as co on cc.country_code = co.code3
+            where co.name = ?1
+        ) as city_count,
+        ci.id as city_id,
+        ci.name as city_name,
+        ci.admin_region,
+        ci.population,
+        {sort_key} as sort_key
+    from country as c
+    left join city as ci on ci.country_code = c.code3
+    where c.name = ?1
+    order by {order}
+    limit ?2;
+"""
+CITY_PAGE_QUERIES = {
+    "name": """
+        select ci.id as city_id, ci.name as city_name, ci.admin_region, ci.population, ci.name as sort_key
+        from city as ci
+        where ci.country_code = ?1 and (ci.name, ci.id) > (?2, ?3)
+        order by ci.name, ci.id
+        limit ?4;
+    """,
+    "population": """
+        select
+            ci.id as city_id,
+            ci.name as city_name,
+            ci.admin_region,
+            ci.population,
+            ifnull(ci.population, -1) as sort_key
+        from city as ci
+        where ci.country_code = ?1
+            and ifnull(ci.population, -1) <= ?2
+            and (ifnull(ci.population, -1) < ?2 or ci.id > ?3)
+        order by ifnull(ci.population, -1) desc, ci.id
+        limit ?4;
+    """,
+}
+
+
+@dataclass(frozen=True)
+class CityPage:
+    """
+    A page of cities ordered by name or population
+
+    :param cities: cities, each with id, name, admin_region, and population
+    :param next_cursor: opaque position of the next page, None on the last page
+    """
+
+    cities: tuple[dict, ...]
+    next_cursor: str | None
+
+    @classmethod
+    def from_rows(cls, rows: list, page_size: int) -> CityPage:
+        cities = tuple(
+            {
+                "id": row["city_id"],
+                "name": row["city_name"],
+                "admin_region": row["admin_region"],
+                "population": row["population"],
+            }
+            for row in rows[:page_size]
+            if row["city_id"] is not None
+        )
+        if len(rows) <= page_size:
+            return cls(cities, None)
+        last = rows[page_size - 1]
+        return cls(cities, encode_cursor(last["sort_key"], last["city_id"]))
+
+
+@dataclass(frozen=True)
+class CountryDocument:
+    """
+    Everything the country page displays
+
+    :param name: country name
+    :param code3: ISO 3166-1 alpha-3 code
+    :param capital: id of the capital city
+    :param continental_region: continental region
+    :param subregion: subregion
+    :param city_count: number of cities in the country
+    :param first_page: first page of cities
+    """
+
+    name: str
+    code3: str
+    capital: int | None
+    continental_region: str | None
+    subregion: str | None
+    city_count: int
+    first_page: CityPage
+
+    @property
+    def cities(self) -> tuple[dict, ...]:
+        return self.first_page.cities
+
+
+def encode_cursor(sort_key: str | int, city_id: int) -> str:
+    """Encode the position after a city as an opaque URL-safe token
+
+    :param sort_key: value the cities are ordered by
+    :param city_id: city id breaking ties
+    """
+    return base64.urlsafe_b64encode(json.dumps([sort_key, city_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[str | int, int]:
+    """Decode a position produced by `encode_cursor`
+
+    :param cursor: opaque token
+    :raises ValueError: the token is malformed
+    """
+    try:
+        sort_key, city_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as error:
+        raise ValueError(f"Cursor {cursor} is malformed") from error
+    if not isinstance(sort_key, (str, int)) or not isinstance(city_id, int):
+        raise ValueError(f"Cursor {cursor} is malformed")
+    return sort_key, city_id
+
+
+def get_country_document(name: str, sort: str = "name") -> CountryDocument | None:
+    """Retrieve a country with its city count and the first page of its cities in a single query
+
+    In the `cache` retrieval mode, documents are cached per database file and contents,
+    country name, and sort order. The name is resolved with the startup name index first,
+    so that unknown names return None without reaching the cache.
+
+    :param name: country name, in any case, with or without accents
+    :param sort: name|population
+    :raises ValueError: the sort order does not exist
+    """
+    if sort not in CITY_ORDERS:
+        raise ValueError(f"Sort order {sort} does not exist")
+    name = current_app.config["name_index"]["country"].resolve(name)
+    if name is None:
+        return None
+    if current_app.config.get("RETRIEVAL_MODE", "cache") != "cache":
+        return _country_document.__wrapped__(None, None, name, sort, current_app.config["CITY_PAGE_SIZE"])
+    return _country_document(
+        current_app.config["DB_FILE"],
+        current_app.config["DB_VERSION"].digest,
+        name,
+        sort,
+        current_app.config["CITY_PAGE_SIZE"],
+    )
+
+
+@cache
+def _country_document(db_file, digest: str | None, name: str, sort: str, page_size: int) -> CountryDocument | None:
+    order, sort_key = CITY_ORDERS[sort]
+    query = COUNTRY_DOCUMENT_QUERY.format(order=order, sort_key=sort_key)
+    records = get_data_from_db(query, (name, page_size + 1))
+    if not records:
+        return None
+    country = records[0]
+    return CountryDocument(
+        country["name"],
+        country["code3"],
+        country["capital"],
+        country["continental_region"],
+        country["subregion"],
+        country["city_count"],
+        CityPage.from_rows(records, page_size),
+    )
+
+
+def get_city_page(country_code: str, sort: str, cursor: str) -> CityPage:
+    """Retrieve the page of cities following a cursor
+
+    The query seeks the position in an index, so every page costs the same regardless of its depth.
+
+    :param country_code: ISO 3166-1 alpha-3 code
+    :param sort: name|population
+    :param cursor: position returned with the previous page
+    :raises ValueError: the sort order does not exist or the cursor is malformed
+    """
+    if sort not in CITY_PAGE_QUERIES:
+        raise ValueError(f"Sort order {sort} does not exist")
+    sort_key, city_id = decode_cursor(cursor)
+    page_size = current_app.config["CITY_PAGE_SIZE"]
+    # Cursors come from clients, so caching their pages would let the cache grow without bound
+    records = get_data_from_db(
+        CITY_PAGE_QUERIES[sort], (country_code, sort_key, city_id, page_size + 1), cached=False
+    )
+    return CityPage.from_rows(records, page_size)
+
+
+MAX_COMPARED = 20
+COUNTRY_COMPARISON_QUERY = """
+    select
+        c.name,
+        c.official_name,
+        c.code3,
+        c.continental_region,
+        c.subregion,
+        c.area,
+        c.population_2023,
+        c.gdp_2023,
+        c.life_expectancy,
+        c.government_system,
+        ci.name as capital_name
+    from country as c
+    left join city as ci on c.capital = ci.id
+    where c.name in ({names});
+"""
+_summaries: dict[tuple, dict | None] = {}
+_summaries_lock = threading.Lock()
+
+
+def get_country_summaries(names: list[str]) -> dict[str, dict | None]:
+    """Retrieve several countries with their capitals in a single query
+
+    In the `cache` retrieval mode, every country is cached on its own,
+    so only the countries that have not been retrieved before are queried.
+    The returned dictionaries are shared and must not be modified.
+
+    :param names: country names
+    """
+    key = (current_app.config["DB_FILE"], current_app.config["DB_VERSION"].digest)
+    use_cache = current_app.config.get("RETRIEVAL_MODE", "cache") == "cache"
+    summaries = {}
+    if use_cache:
+        with _summaries_lock:
+            summaries = {name: _summaries[key, name] for name in names if (key, name) in _summaries}
+    missing = sorted(set(names) - summaries.keys())
+    if missing:
+        query = COUNTRY_COMPARISON_QUERY.format(names=", ".join("?" * len(missing)))
+        records = {row["name"]: dict(row) for row in get_data_from_db(query, tuple(missing), cached=False)}
+        fetched = {name: records.get(name) for name in missing}
+        summaries.update(fetched)
+        if use_cache:
+            with _summaries_lock:
+                _summaries.update({(key, name): summary for name, summary in fetched.items()})
+    return {name: summaries[name] for name in names}
+
+
+def compare_countries(values: list[str]) -> list[tuple[str, dict | None]]:
+    """Retrieve the countries listed for comparison
+
+    Names are matched ignoring case and accents, and listed once each in the requested order.
+    Unknown names are kept in the result without a country.
+    Lists too long to hold at most MAX_COMPARED names are rejected before they are split.
+
+    :param values: comma-separated country names
+    :raises ValueError: more than MAX_COMPARED countries are requested
+    """
+    index = current_app.config["name_index"]["country"]
+    pieces = sum(1 for value in values for part in value.split(",") if part.strip())
+    if pieces > MAX_COMPARED * index.widest:
+        raise ValueError(f"Compare at most {MAX_COMPARED} countries at once")
+    requested = []
+    seen = set()
+    for name in index.split(values):
+        canonical = index.resolve(name)
+        if canonical is None or canonical not in seen:
+            requested.append((name, canonical))
+            seen.add(canonical)
+    if len(requested) > MAX_COMPARED:
+        raise ValueError(f"Compare at most {MAX_COMPARED} countries at once")
+    summaries = get_country_summaries([canonical for _, canonical in requested if canonical is not None])
+    return [(name, summaries[canonical] if canonical else None) for name, canonical in requested]
+
+
+def clear_cache() -> None:
+    """Forget every cached query result, e.g. after the database has changed"""
+    _fetch_all.cache_clear()
+    _country_document.cache_clear()
+    with _summaries_lock:
+        _summaries.clear()
+
+
+def stream_data_from_db(
+    query: str, params: tuple | None = None, batch_size: int = 500
+) -> Iterator[sqlite3.Row]:
+    """Retrieve data from the database one batch at a time
+
+    Unlike `get_data_from_db`, the result is neither materialized nor cached,
+    so it is suitable for exporting whole tables.
+    The database file is resolved eagerly, so the returned iterator
+    can be consumed outside of the application context.
+
+    :param query: parametrized query to execute
+    :param params: query parameters
+    :param batch_size: number of rows to fetch per round trip
+    """
+    return _stream_rows(current_app.config["DB_FILE"], query, params or tuple(), batch_size)
+
+
+def _stream_rows(db_file, query: str, params: tuple, batch_size: int) -> Iterator[sqlite3.Row]:
+    connection = sqlite3.connect(db_file)
     connection.row_factory = sqlite3.Row
     try:
         cursor = connection.execute(query, params)
-        return cursor.fetchall()
+        while batch := cursor.fetchmany(batch_size):
+            yield from batch
     finally:
         connection.close()
@@ -8,14 +8,80 @@ Geography app routes
 
 from __future__ import annotations
 
-from flask import Blueprint, abort, current_app, flash, redirect, render_template, request, url_for
+from flask import Blueprint, abort, current_app, flash, g, redirect, render_template, request, url_for
 from werkzeug.wrappers import Response
 
-from .retrieval import get_data_from_db
+from .caching import CachedPage
+from .retrieval import compare_countries, get_city_page, get_country_document, get_data_from_db
 
 main = Blueprint("main", __name__, url_prefix="/")
 
 
+@main.before_request
+def serve_cached() -> Response | None:
+    """Answer from the validators or the response cache without rendering"""
+    if request.method not in ("GET", "HEAD"):
+        return None
+    version = current_app.config["DB_VERSION"]
+    etag = version.etag(request.path, request.query_string)
+    if not request.if_none_match.star_tag and etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.last_modified = version.last_modified
+        g.page_cached = True
+        return response
+    page = current_app.config["response_cache"].get((request.path, request.query_string))
+    if page is None:
+        return None
+    g.page_cached = True
+    return page.to_response(current_app.response_class)
+
+
+@main.after_request
+def add_validators(response: Response) -> Response:
+    """Make pages conditional on the database version and cache them
+
+    Validators are only attached to successful pages,
+    so a client can never revalidate a `Not Found` into a `304 Not Modified`.
+    """
+    if request.method not in ("GET", "HEAD") or response.status_code not in (200, 301, 404):
+        return response
+    if not g.get("page_cached"):
+        current_app.config["response_cache"].put(
+            (request.path, request.query_string), CachedPage.from_response(response)
+        )
+    if response.status_code == 200:
+        version = current_app.config["DB_VERSION"]
+        response.set_etag(version.etag(request.path, request.query_string))
+        response.last_modified = version.last_modified
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
+
+
+def canonical_redirect(kind: str, name: str) -> Response | None:
+    """Redirect a misspelled name to its canonical page
+
+    Names are matched ignoring case, accents, and punctuation using the index built at startup,
+    so an unknown name is rejected without querying the database.
+    The redirect is permanent and cacheable, since the canonical spelling does not depend on the request.
+
+    :param kind: country|region|subregion
+    :param name: name as requested
+    :raises NotFound: there is no such name
+    """
+    canonical = current_app.config["name_index"][kind].resolve(name)
+    if canonical is None:
+        abort(404, description=f"{kind.capitalize()} '{name}' was not found.")
+    if canonical == name:
+        return None
+    args = {key: value for key, value in request.args.items() if key != "name"}
+    response = redirect(url_for(f"main.{kind}", name=canonical, **args), code=301)
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response
+
+
 @main.route("/")
 def world() -> str:
     """Display default page"""
@@ -40,7 +106,6 @@ def world() -> str:
         countries=records,
         heading=heading,
         message=None,
-        country_options=current_app.config["countries"],
     )
 
 
@@ -49,17 +114,16 @@ def world() -> str:
 def region(name: str | None) -> str | Response:
     """Display region information"""
     selected_region = name or request.args.get("name")
-    options = current_app.config["regions"]
     if not selected_region:
         return render_template(
             "region.jinja",
             countries=[],
             heading=None,
             message="Choose a continental region to see the list of countries.",
-            country_options=current_app.config["countries"],
-            region_options=options,
             selected_region=None,
         )
+    if (response := canonical_redirect("region", selected_region)) is not None:
+        return response
     query = """
         select
             c.name,
@@ -84,8 +148,6 @@ def region(name: str | None) -> str | Response:
         countries=records,
         heading=heading,
         message=None,
-        country_options=current_app.config["countries"],
-        region_options=options,
         selected_region=selected_region,
     )
 
@@ -95,17 +157,16 @@ def region(name: str | None) -> str | Response:
 def subregion(name: str | None) -> str | Response:
     """Display subregion information"""
     selected_subregion = name or request.args.get("name")
-    options = current_app.config["subregions"]
     if not selected_subregion:
         return render_template(
             "subregion.jinja",
             countries=[],
             heading=None,
             message="Choose a subregion to see the list of its countries.",
-            country_options=current_app.config["countries"],
-            subregion_options=options,
             selected_subregion=None,
         )
+    if (response := canonical_redirect("subregion", selected_subregion)) is not None:
+        return response
     query = """
         select
             c.name,
@@ -130,8 +191,6 @@ def subregion(name: str | None) -> str | Response:
         countries=records,
         heading=heading,
         message=None,
-        country_options=current_app.config["countries"],
-        subregion_options=options,
         selected_subregion=selected_subregion,
     )
 
@@ -141,39 +200,92 @@ def subregion(name: str | None) -> str | Response:
 def country(name: str | None) -> str | Response:
     """Display country information"""
     selected_country = name or request.args.get("name")
-    options = current_app.config["countries"]
     if not selected_country:
         return render_template(
             "country.jinja",
             cities=None,
             heading=None,
-            country_options=options,
             selected_country=None,
             capital_id=None,
             country_info=None,
         )
-    country_query = "select * from country where name=?;"
-    country_data = get_data_from_db(country_query, (selected_country,))
-    if not country_data:
+    if (response := canonical_redirect("country", selected_country)) is not None:
+        return response
+    sort = request.args.get("sort", "name")
+    try:
+        document = get_country_document(selected_country, sort)
+    except ValueError as error:
+        abort(404, description=str(error))
+    if document is None:
         abort(404, description=f"Country '{selected_country}' was not found.")
-    country_info = dict(country_data[0])
-    city_query = "select * from city where country_code=? order by name;"
-    cities = [dict(row) for row in get_data_from_db(city_query, (country_info["code3"],))]
-    heading = f"{len(cities)} cities of {country_info['name']}"
+    heading = f"{document.city_count} cities of {document.name}"
     return render_template(
         "country.jinja",
-        cities=cities,
+        cities=document.cities,
         heading=heading,
-        country_options=options,
         selected_country=selected_country,
-        capital_id=country_info.get("capital"),
-        country_info=country_info,
+        capital_id=document.capital,
+        country_info=document,
+        sort=sort,
+        next_cursor=document.first_page.next_cursor,
+    )
+
+
+@main.get("/country/<string:name>/cities")
+def country_cities(name: str) -> str:
+    """Display the next page of cities as table rows for infinite scrolling"""
+    sort = request.args.get("sort", "name")
+    try:
+        document = get_country_document(name, sort)
+        if document is None:
+            abort(404, description=f"Country '{name}' was not found.")
+        page = get_city_page(document.code3, sort, request.args.get("after", ""))
+    except ValueError as error:
+        abort(404, description=str(error))
+    return render_template(
+        "cities.jinja",
+        cities=page.cities,
+        capital_id=document.capital,
+        selected_country=document.name,
+        sort=sort,
+        next_cursor=page.next_cursor,
+    )
+
+
+@main.get("/compare")
+def compare() -> str:
+    """Display several countries side by side"""
+    names = request.args.getlist("names")
+    if not names:
+        return render_template(
+            "compare.jinja",
+            countries=[],
+            heading=None,
+            message="List the countries to compare, separated by commas.",
+            names="",
+        )
+    try:
+        comparison = compare_countries(names)
+    except ValueError as error:
+        abort(404, description=str(error))
+    for name, country in comparison:
+        if country is None:
+            flash(f"Country '{name}' was not found.", "warning")
+    records = [country for _, country in comparison if country is not None]
+    return render_template(
+        "compare.jinja",
+        countries=records,
+        heading=f"Comparing {len(records)} countries and territories",
+        message=None,
+        names=", ".join(name for name, _ in comparison),
     )
 
 
 @main.errorhandler(404)
 def not_found(err):
     description = getattr(err, "description", "Requested resource was not found.")
+    if request.endpoint == "main.country_cities":
+        return description, 404
     flash(description, "warning")
     path = request.path
     if path.startswith("/region"):
@@ -183,8 +295,6 @@ def not_found(err):
                 countries=[],
                 heading=None,
                 message=description,
-                country_options=current_app.config["countries"],
-                region_options=current_app.config["regions"],
                 selected_region=None,
             ),
             404,
@@ -196,19 +306,27 @@ def not_found(err):
                 countries=[],
                 heading=None,
                 message=description,
-                country_options=current_app.config["countries"],
-                subregion_options=current_app.config["subregions"],
                 selected_subregion=None,
             ),
             404,
         )
+    elif path.startswith("/compare"):
+        return (
+            render_template(
+                "compare.jinja",
+                countries=[],
+                heading=None,
+                message=description,
+                names=", ".join(request.args.getlist("names")),
+            ),
+            404,
+        )
     elif path.startswith("/country"):
         return (
             render_template(
                 "country.jinja",
                 cities=[],
                 heading=None,
-                country_options=current_app.config["countries"],
                 selected_country=None,
                 capital_id=None,
                 country_info=None,
@@ -223,7 +341,6 @@ def not_found(err):
                 countries=[],
                 heading=None,
                 message=description,
-                country_options=current_app.config["countries"],
             ),
             404,
         )
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Geography database indexes
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import os
+import pathlib
+import re
+import sqlite3
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+INDEXES = (
+    "create index if not exists city_country_name on city (country_code, name, id);",
+    "create index if not exists city_country_population on city (country_code, ifnull(population, -1) desc, id);",
+)
+INDEX_NAMES = tuple(re.match(r"create index if not exists (\w+)", statement)[1] for statement in INDEXES)
+
+
+def missing_indexes(db_file: str | os.PathLike) -> list[str]:
+    """List the indexes the app relies on that the database lacks
+
+    The database is opened read-only, so this is safe to call from every worker on startup.
+
+    :param db_file: path to the database
+    """
+    connection = sqlite3.connect(f"{pathlib.Path(db_file).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        existing = {name for (name,) in connection.execute("select name from sqlite_master where type='index';")}
+    finally:
+        connection.close()
+    return [name for name in INDEX_NAMES if name not in existing]
+
+
+@click.command("create-indexes")
+@with_appcontext
+def create_indexes():
+    """Create the indexes the app relies on, if they are missing.
+
+    `import-data` builds them too, so this is only needed for databases made some other way.
+    """
+    connection = sqlite3.connect(current_app.config["DB_FILE"])
+    try:
+        with connection:
+            for statement in INDEXES:
+                connection.execute(statement)
+    finally:
+        connection.close()
+    click.echo(f"Indexes ready in {current_app.config['DB_FILE']}")
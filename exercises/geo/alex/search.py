@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Geography name search
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import bisect
+import heapq
+import re
+import unicodedata
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import lru_cache
+
+WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Fold a name for case- and accent-insensitive comparison
+
+    :param text: name to fold
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+@dataclass(frozen=True)
+class Suggestion:
+    """
+    A single type-ahead match
+
+    :param name: canonical name of a country or a city
+    :param kind: country|city
+    :param population: most recent population, if known
+    :param country: country a city belongs to
+    """
+
+    name: str
+    kind: str
+    population: int | None
+    country: str | None = None
+
+
+class PrefixIndex:
+    """
+    Sorted prefix index over country and city names
+
+    Every name is indexed under its full normalized form and under the suffix starting at each word,
+    so that both "cote" and "ivoire" find "Côte d'Ivoire".
+    Lookups are two binary searches over the sorted keys followed by a top-k selection by population.
+    """
+
+    def __init__(self, suggestions: Iterable[Suggestion]):
+        self._suggestions = tuple(suggestions)
+        keys = set()
+        for idx, suggestion in enumerate(self._suggestions):
+            folded = normalize(suggestion.name)
+            for word in WORD.finditer(folded):
+                keys.add((folded[word.start() :], idx))
+        ordered = sorted(keys)
+        self._keys = [key for key, _ in ordered]
+        self._ids = [idx for _, idx in ordered]
+
+    def __len__(self) -> int:
+        return len(self._suggestions)
+
+    def lookup(self, prefix: str, limit: int = 10, kind: str | None = None) -> tuple[Suggestion, ...]:
+        """Find the most populous names starting with a prefix
+
+        :param prefix: beginning of a name or of any word in it
+        :param limit: maximum number of suggestions to return
+        :param kind: country|city to restrict the results, None for both
+        """
+        return self._lookup(normalize(prefix).strip(), limit, kind)
+
+    @lru_cache(maxsize=4096)
+    def _lookup(self, prefix: str, limit: int, kind: str | None) -> tuple[Suggestion, ...]:
+        if not prefix or limit <= 0:
+            return tuple()
+        start = bisect.bisect_left(self._keys, prefix)
+        stop = bisect.bisect_right(self._keys, prefix + "\U0010ffff", lo=start)
+        candidates = {
+            self._ids[pos]
+            for pos in range(start, stop)
+            if kind is None or self._suggestions[self._ids[pos]].kind == kind
+        }
+        best = heapq.nsmallest(limit, candidates, key=self._rank)
+        return tuple(self._suggestions[idx] for idx in best)
+
+    def _rank(self, idx: int) -> tuple[int, str]:
+        suggestion = self._suggestions[idx]
+        return (-(suggestion.population or 0), suggestion.name)
+
+
+def name_key(text: str) -> str:
+    """Fold a name ignoring case, accents, punctuation, and spacing
+
+    :param text: name to fold
+    """
+    return " ".join(WORD.findall(normalize(text)))
+
+
+class NameIndex:
+    """
+    Canonical spellings of names keyed by their folded form
+
+    "france", "COTE D’IVOIRE", and "cote-d-ivoire" resolve with a single dictionary lookup.
+    `widest` is the largest number of comma-separated pieces in a name.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self._canonical: dict[str, str] = {}
+        self.widest = 1
+        for name in names:
+            self._canonical.setdefault(name_key(name), name)
+            self.widest = max(self.widest, name.count(",") + 1)
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def resolve(self, name: str) -> str | None:
+        """Get the canonical spelling of a name, None if there is no such name
+
+        :param name: name spelled in any case, with or without accents
+        """
+        return self._canonical.get(name_key(name))
+
+    def split(self, values: Iterable[str]) -> list[str]:
+        """Split comma-separated lists of names, keeping the commas that are part of a name
+
+        Adjacent pieces are joined back whenever they form a known name, longest first,
+        so "Saint Helena, Ascension and Tristan da Cunha" stays in one piece.
+        No name spans more than `widest` pieces, so the time is linear in the number of pieces.
+
+        :param values: comma-separated names
+        """
+        parts = [part.strip() for value in values for part in value.split(",") if part.strip()]
+        names = []
+        start = 0
+        while start < len(parts):
+            stop = next(
+                (
+                    stop
+                    for stop in range(min(len(parts), start + self.widest), start + 1, -1)
+                    if self.resolve(", ".join(parts[start:stop])) is not None
+                ),
+                start + 1,
+            )
+            names.append(", ".join(parts[start:stop]))
+            start = stop
+        return names
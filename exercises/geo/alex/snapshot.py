@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Geography startup snapshot
+
+@author:
+@version: 2025.11
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import pathlib
+
+SNAPSHOT_FORMAT = 3
+
+
+def snapshot_path(db_file: str | os.PathLike) -> pathlib.Path:
+    """Get the location of the sidecar snapshot of a database
+
+    :param db_file: path to the database
+    """
+    db_file = pathlib.Path(db_file)
+    return db_file.with_name(f"{db_file.name}.snapshot")
+
+
+def read_snapshot(db_file: str | os.PathLike, digest: str) -> dict | None:
+    """Read the lookup data saved for a database
+
+    The snapshot is plain JSON, so reading it never runs code,
+    and it is used only if it was saved for the database contents hash `digest`.
+    Returns None if there is no usable snapshot.
+
+    :param db_file: path to the database
+    :param digest: SHA-256 of the current database contents
+    """
+    try:
+        with snapshot_path(db_file).open("r", encoding="utf-8") as data:
+            snapshot = json.load(data)
+    except (OSError, UnicodeDecodeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict):
+        return None
+    if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("digest") != digest:
+        return None
+    return snapshot.get("lookups")
+
+
+def write_snapshot(db_file: str | os.PathLike, digest: str, lookups: dict) -> bool:
+    """Save the lookup data queried from a specific version of a database
+
+    The snapshot is written to a temporary file first and then renamed,
+    so concurrent readers never see a partial snapshot.
+    Returns False if the snapshot could not be written, e.g. next to a read-only database.
+
+    :param db_file: path to the database
+    :param digest: SHA-256 of the database contents the data was queried from
+    :param lookups: JSON-serializable lookup data
+    """
+    target = snapshot_path(db_file)
+    staging = target.with_name(f"{target.name}.{os.getpid()}")
+    try:
+        with staging.open("w", encoding="utf-8") as data:
+            json.dump({"format": SNAPSHOT_FORMAT, "digest": digest, "lookups": lookups}, data)
+        os.replace(staging, target)
+    except OSError:
+        staging.unlink(missing_ok=True)
+        return False
+    return True
@@ -1,24 +1,103 @@
-from flask import Flask, session, redirect, url_for, escape, request, render_template
+from flask import Flask, session, redirect, url_for, request, render_template
+from markupsafe import escape
 import os
+import pathlib
+import threading
 
+from ..authorization.panda.ratelimit import MemoryBuckets, RateLimiter, SQLiteBuckets, rate_limited
+from .hashing import HashingBusy, HashingService, calibrate
+
+USERS = ("Alice", "Bob")
+
+# Every worker must sign sessions and check passwords alike, so nothing is made up per process
+missing = [name for name in ("SECRET_KEY", *(f"{user.upper()}_PASSWORD" for user in USERS)) if not os.environ.get(name)]
+if missing:
+    raise RuntimeError(f"Set {', '.join(missing)} in the environment")
 
 app = Flask(__name__)
-app.secret_key = os.environ.get("SECRET_KEY")
+app.secret_key = os.environ["SECRET_KEY"]
+
+# Login attempts per client address and per username, shared by all workers if RATE_LIMIT_DATABASE is set
+app.config["rate_limiter"] = RateLimiter(
+    SQLiteBuckets(pathlib.Path(os.environ["RATE_LIMIT_DATABASE"]))
+    if os.environ.get("RATE_LIMIT_DATABASE")
+    else MemoryBuckets(),
+    {"ip": (0.2, 10), "account": (0.05, 5)},
+)
+
+# Password hashes by username, set up with the hashing service on the first request
+hasher: HashingService | None = None
+passwords: dict[str, str] = {}
+passwords_lock = threading.Lock()
+
+
+def get_hasher() -> HashingService:
+    """Get the hashing service, setting it up on first use
+
+    New hashes use as many PBKDF2 rounds as fit in PASSWORD_HASH_MS milliseconds, unless PASSWORD_ROUNDS is set.
+    The passwords come from ALICE_PASSWORD and BOB_PASSWORD.
+    """
+    global hasher
+    if hasher is None:
+        with passwords_lock:
+            if hasher is None:
+                service = HashingService(
+                    int(os.environ.get("PASSWORD_ROUNDS") or calibrate(float(os.environ.get("PASSWORD_HASH_MS", 250)))),
+                    max_pending=int(os.environ.get("PASSWORD_MAX_PENDING", 64)),
+                )
+                for user in USERS:
+                    passwords[user] = service.hash(os.environ[f"{user.upper()}_PASSWORD"])
+                hasher = service
+    return hasher
+
+
+@app.before_request
+def set_up_passwords():
+    """Make the passwords ready before the login page is shown for the first time"""
+    get_hasher()
+
+
+def attempt_address():
+    """Client address of a login attempt, None for anything else"""
+    return request.remote_addr if request.method == "POST" else None
+
+
+def attempt_account():
+    """Username of a login attempt, None for anything else"""
+    return request.form.get("username", "").strip().lower() or None if request.method == "POST" else None
 
 
 @app.route("/")
 def index():
-    raise NotImplementedError
-
+    if "username" not in session:
+        return redirect(url_for("login"))
+    return render_template("index.html", username=escape(session["username"]))
 
 
 @app.route("/login", methods=["GET", "POST"])
+@rate_limited("ip", attempt_address)
+@rate_limited("account", attempt_account)
 def login():
-    raise NotImplementedError
-
+    if request.method == "GET":
+        return render_template("login.html", users=USERS)
+    username = request.form.get("username", "")
+    try:
+        # The request thread waits, but the hashing itself is bounded by the pool
+        valid, new_hash = get_hasher().verify(request.form.get("password", ""), passwords.get(username))
+    except HashingBusy:
+        page = render_template("login.html", users=USERS, error="Too many logins, try again")
+        return page, 503, {"Retry-After": "1"}
+    if not valid:
+        return render_template("login.html", users=USERS, error="Wrong username or password"), 401
+    if new_hash:
+        # The stored hash used outdated parameters
+        with passwords_lock:
+            passwords[username] = new_hash
+    session["username"] = username
+    return redirect(url_for("index"))
 
 
 @app.route("/logout", methods=["POST"])
 def logout():
-    raise NotImplementedError
-
+    session.pop("username", None)
+    return redirect(url_for("login"))
@@ -0,0 +1,104 @@
+"""
+Password hashing off the request thread
+
+@author:
+@version: 2025.12
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+CALIBRATION_ROUNDS = 10_000
+MIN_ROUNDS = 1_000
+
+
+class HashingBusy(Exception):
+    """Too many passwords are waiting to be hashed"""
+
+
+def calibrate(target_ms: float = 250, samples: int = 3) -> int:
+    """Find the number of PBKDF2-SHA256 rounds that takes about `target_ms` milliseconds on this machine
+
+    :param target_ms: time one hash should take
+    :param samples: number of timed hashes, the fastest is used
+    """
+    context = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=CALIBRATION_ROUNDS)
+    elapsed = float("inf")
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.hash("calibration")
+        elapsed = min(elapsed, time.perf_counter() - start)
+    rounds = CALIBRATION_ROUNDS * target_ms / 1000 / elapsed
+    # Round to two significant digits, so that restarts on the same machine agree
+    magnitude = 10 ** max(0, len(str(int(rounds))) - 2)
+    return max(MIN_ROUNDS, int(rounds // magnitude * magnitude))
+
+
+class HashingService:
+    """
+    PBKDF2-SHA256 hashing on a bounded pool of threads
+
+    hashlib releases the GIL while hashing, so the workers use all cores, and at most `workers` hashes run at once
+    however many requests arrive. At most `max_pending` hashes may wait for a worker; more are rejected
+    with `HashingBusy` instead of piling up. Hashes made with less than `tolerance` below `rounds` rounds
+    are replaced on the next successful login.
+
+    :param rounds: PBKDF2 rounds of new hashes, e.g. from `calibrate`
+    :param workers: number of threads, one per core by default
+    :param max_pending: number of hashes that may wait for a thread
+    :param tolerance: share of `rounds` that an existing hash may fall short of
+    """
+
+    def __init__(self, rounds: int, workers: int | None = None, max_pending: int = 64, tolerance: float = 0.2):
+        self.rounds = rounds
+        self.context = CryptContext(
+            schemes=["pbkdf2_sha256"],
+            pbkdf2_sha256__default_rounds=rounds,
+            pbkdf2_sha256__min_rounds=int(rounds * (1 - tolerance)),
+        )
+        self.workers = workers or os.cpu_count() or 1
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="hashing")
+        self._slots = threading.BoundedSemaphore(self.workers + max_pending)
+        # Verified when the user is unknown, so that the response takes as long as for a known user
+        self._dummy: str | None = None
+
+    def _submit(self, function, *args, timeout: float | None):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy()
+        return self._executor.submit(self._run, function, *args).result(timeout)
+
+    def _run(self, function, *args):
+        try:
+            return function(*args)
+        finally:
+            # Released before the caller gets the result, so that it can hash again right away
+            self._slots.release()
+
+    def hash(self, password: str, timeout: float | None = None) -> str:
+        """Hash a new password
+
+        :raises HashingBusy: too many passwords are waiting
+        """
+        return self._submit(self.context.hash, password, timeout=timeout)
+
+    def verify(self, password: str, stored: str | None, timeout: float | None = None) -> tuple[bool, str | None]:
+        """Check a password against its stored hash
+
+        :param password: password to check
+        :param stored: stored hash, None if there is no such user
+        :return: whether the password matches, and a new hash to store if the stored one is outdated
+        :raises HashingBusy: too many passwords are waiting
+        """
+        if stored is None:
+            if self._dummy is None:
+                self._dummy = self._submit(self.context.hash, os.urandom(16).hex(), timeout=timeout)
+            self._submit(self.context.verify, password, self._dummy, timeout=timeout)
+            return False, None
+        return self._submit(self.context.verify_and_update, password, stored, timeout=timeout)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
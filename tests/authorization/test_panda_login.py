@@ -0,0 +1,566 @@
+#!/usr/bin/env python3
+"""
+Testing PandAuth login against a stand-in provider
+
+@author: Roman Yasinovskyy
+@version: 2025.12
+"""
+
+import csv
+import datetime
+import json
+import pathlib
+import sys
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib import util
+
+import pytest
+import requests
+from oauthlib.oauth2 import WebApplicationClient
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    from exercises.authorization.mock_provider import create_provider, make_id_token, serve, signing_key
+    from exercises.authorization.panda import create_app, db
+    from exercises.authorization.panda.models import User
+    from exercises.authorization.panda.audit import AuditLog
+    from exercises.authorization.panda.oidc import make_session
+    from exercises.authorization.panda.ratelimit import MemoryBuckets, RateLimiter, SQLiteBuckets
+    from exercises.authorization.panda.sessions import SQLiteStore
+    from exercises.authorization.panda.tokens import InvalidToken, KeySet, verify_id_token
+    from exercises.authorization.panda.user_cache import UserCache
+
+
+@pytest.fixture(name="provider")
+def fixture_provider():
+    """Run the stand-in provider"""
+    provider = create_provider()
+    with serve(provider) as url:
+        provider.config["url"] = url
+        provider.config["discovery"] = requests.get(f"{url}/.well-known/openid-configuration", timeout=5).json()
+        provider.config["calls"].clear()
+        yield provider
+
+
+@pytest.fixture(name="app")
+def fixture_app(tmp_path, provider, monkeypatch):
+    """Create the app fixture using the stand-in provider over plain HTTP"""
+    monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    return create_app(
+        {
+            "TESTING": True,
+            "GOOGLE_CLIENT_ID": "panda",
+            "GOOGLE_CLIENT_SECRET": "secret",
+            "GOOGLE_CONFIG": provider.config["discovery"],
+            "DATABASE": tmp_path / "users.db",
+            "AVATAR_DIR": tmp_path / "avatars",
+            "RATE_LIMITS": {},
+        }
+    )
+
+
+def claims(provider, **changes) -> dict:
+    now = int(time.time())
+    return {"iss": provider.config["url"], "aud": "panda", "sub": "po", "iat": now, "exp": now + 60, **changes}
+
+
+def test_login_reads_the_id_token(app, provider) -> None:
+    """The profile comes from the verified ID token and the keys are fetched once"""
+    client = app.test_client()
+    for user in ("po", "tigress"):
+        response = client.get(f"/auth/login/callback?code={user}")
+        assert response.status_code == 302
+        assert f"{user}@example.com" in client.get("/").get_data(as_text=True)
+    assert provider.config["calls"] == {"token": 2, "jwks": 1}
+    with app.app_context():
+        assert db.session.get(User, "tigress").name == "Panda"
+
+
+def test_provider_from_discovery_url(tmp_path, provider, monkeypatch) -> None:
+    """The app can be pointed at a provider by its discovery URL"""
+    monkeypatch.setenv("OAUTHLIB_INSECURE_TRANSPORT", "1")
+    url = provider.config["url"]
+    app = create_app(
+        {
+            "TESTING": True,
+            "GOOGLE_CLIENT_ID": "panda",
+            "GOOGLE_CLIENT_SECRET": "secret",
+            "GOOGLE_CONFIG": f"{url}/.well-known/openid-configuration",
+            "DISCOVERY_CACHE": tmp_path / "discovery.json",
+            "DATABASE": tmp_path / "users.db",
+        }
+    )
+    assert app.config["discovery"].refresh()
+    client = app.test_client()
+    assert client.get("/auth/login").location.startswith(f"{url}/authorize?")
+    client.get("/auth/login/callback?code=po")
+    assert "po@example.com" in client.get("/").get_data(as_text=True)
+
+    # An unreachable provider does not stop the app, only the logins
+    missing = create_app({**app.config, "GOOGLE_CONFIG": f"{url}/missing"})
+    for route in ("/auth/login", "/auth/login/callback?code=po"):
+        response = missing.test_client().get(route)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+
+
+def test_userinfo(provider) -> None:
+    """The stand-in provider describes the user an access token was issued for"""
+    url = provider.config["url"]
+    token = requests.post(
+        f"{url}/token", data={"grant_type": "authorization_code", "code": "po"}, auth=("panda", "secret"), timeout=5
+    ).json()
+    response = requests.get(f"{url}/userinfo", headers={"Authorization": f"Bearer {token['access_token']}"}, timeout=5)
+    assert response.json()["email"] == "po@example.com"
+    assert "aud" not in response.json()
+    assert requests.get(f"{url}/userinfo", headers={"Authorization": "Bearer forged"}, timeout=5).status_code == 401
+
+
+def test_login_with_a_bad_code(app, provider) -> None:
+    """A failed token exchange does not log anyone in"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=")
+    response = client.get("/auth/login/callback?code=po&error=access_denied")
+    assert response.status_code == 302
+    with app.app_context():
+        assert db.session.query(User).count() == 0
+
+
+@pytest.mark.parametrize(
+    "changes, header",
+    [
+        ({"aud": "tai-lung"}, {}),
+        ({"iss": "https://accounts.google.com"}, {}),
+        ({"exp": 1}, {}),
+        ({"iat": 4102444800}, {}),
+        ({}, {"alg": "none"}),
+        ({}, {"kid": "forged"}),
+    ],
+)
+def test_invalid_tokens(provider, changes: dict, header: dict) -> None:
+    """Tokens that are not for us, expired, or not signed by the provider are rejected"""
+    keys = KeySet(make_session())
+    token = make_id_token(provider.config["keys"][0], claims(provider, **changes), header)
+    with pytest.raises(InvalidToken):
+        verify_id_token(token, keys, f"{provider.config['url']}/jwks", provider.config["url"], "panda")
+
+
+def test_tampered_token(provider) -> None:
+    """Changing the claims invalidates the signature"""
+    keys = KeySet(make_session())
+    header, _, signature = make_id_token(provider.config["keys"][0], claims(provider)).split(".")
+    forged = make_id_token(provider.config["keys"][0], claims(provider, sub="tai-lung")).split(".")[1]
+    with pytest.raises(InvalidToken, match="signature"):
+        verify_id_token(
+            f"{header}.{forged}.{signature}", keys, f"{provider.config['url']}/jwks", provider.config["url"], "panda"
+        )
+
+
+def test_rotated_keys(provider) -> None:
+    """A token signed with a new key makes the keys be fetched again, but not too often"""
+    keys = KeySet(make_session(), min_refresh=60)
+    jwks_uri = f"{provider.config['url']}/jwks"
+    token = make_id_token(provider.config["keys"][0], claims(provider))
+    assert verify_id_token(token, keys, jwks_uri, provider.config["url"], "panda")["sub"] == "po"
+
+    provider.config["keys"].insert(0, signing_key("mock-2"))
+    rotated = make_id_token(provider.config["keys"][0], claims(provider))
+    with pytest.raises(InvalidToken, match="Unknown signing key"):
+        verify_id_token(rotated, keys, jwks_uri, provider.config["url"], "panda")
+    assert provider.config["calls"]["jwks"] == 1
+
+    keys.min_refresh = 0
+    assert verify_id_token(rotated, keys, jwks_uri, provider.config["url"], "panda")["sub"] == "po"
+    assert verify_id_token(token, keys, jwks_uri, provider.config["url"], "panda")["sub"] == "po"
+    assert provider.config["calls"]["jwks"] == 2
+
+
+def test_keys_expire(provider) -> None:
+    """Keys are fetched again once the provider's max-age has passed"""
+    provider.config["JWKS_MAX_AGE"] = 0
+    keys = KeySet(make_session())
+    token = make_id_token(provider.config["keys"][0], claims(provider))
+    for _ in range(2):
+        verify_id_token(token, keys, f"{provider.config['url']}/jwks", provider.config["url"], "panda")
+    assert provider.config["calls"]["jwks"] == 2
+
+
+def test_keys_are_fetched_once(provider) -> None:
+    """Concurrent verifications of a token with unknown keys fetch them once"""
+    keys = KeySet(make_session())
+    token = make_id_token(provider.config["keys"][0], claims(provider))
+    with ThreadPoolExecutor(8) as pool:
+        verified = pool.map(
+            lambda _: verify_id_token(token, keys, f"{provider.config['url']}/jwks", provider.config["url"], "panda"),
+            range(16),
+        )
+        assert {claims["sub"] for claims in verified} == {"po"}
+    assert provider.config["calls"]["jwks"] == 1
+
+
+def test_user_cache(app) -> None:
+    """Logged-in page views load the user from the cache"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    for _ in range(5):
+        assert "po@example.com" in client.get("/").get_data(as_text=True)
+    stats = client.get("/auth/cache").get_json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 5
+    assert stats["hit_ratio"] == pytest.approx(5 / 6)
+    assert stats["saved_ms"] > 0
+
+
+def test_user_cache_expiry_and_eviction(monkeypatch) -> None:
+    """Users expire after the TTL, the least recently used ones are evicted, and invalidation forgets them"""
+    clock = [0.0]
+    monkeypatch.setattr("time.monotonic", lambda: clock[0])
+    cache = UserCache(maxsize=2, ttl=10)
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return {"id": user_id} if user_id != "tai-lung" else None
+
+    for user_id in ("po", "po", "tigress", "po", "monkey", "tigress", "tai-lung", "tai-lung"):
+        cache.get(user_id, load)
+    assert loads == ["po", "tigress", "monkey", "tigress", "tai-lung", "tai-lung"]
+    clock[0] = 11
+    cache.get("tigress", load)
+    cache.invalidate("tigress")
+    cache.get("tigress", load)
+    assert loads[-2:] == ["tigress", "tigress"]
+    assert len(cache) == 2
+
+
+def test_concurrent_logins(app, provider, monkeypatch) -> None:
+    """Parallel logins on a threaded server each end up with their own user"""
+
+    parse = WebApplicationClient.parse_request_body_response
+
+    def slow_parse(self, *args, **kwargs):
+        # Widen the window between storing the token in the client and reading it back
+        token = parse(self, *args, **kwargs)
+        time.sleep(0.005)
+        return token
+
+    monkeypatch.setattr(WebApplicationClient, "parse_request_body_response", slow_parse)
+    users = [f"panda-{idx}" for idx in range(200)]
+
+    with serve(app) as url:
+
+        def log_in(user: str) -> str:
+            with requests.Session() as browser:
+                return browser.get(f"{url}/auth/login/callback?code={user}", timeout=30).text
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            pages = list(executor.map(log_in, users))
+
+    for user, page in zip(users, pages):
+        assert f"<strong>{user}@example.com</strong>" in page
+    assert provider.config["calls"]["token"] == len(users)
+    with app.app_context():
+        assert db.session.query(User).count() == len(users)
+
+
+def test_login_refreshes_the_profile(app, provider) -> None:
+    """Logging in again updates the profile but keeps the registration time"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    client.get("/")
+    with app.app_context():
+        registered = db.session.get(User, "po").registered
+    provider.config["profiles"]["po"] = {"given_name": "Dragon Warrior", "email": "dragon@example.com"}
+    client.get("/auth/login/callback?code=po")
+    assert "dragon@example.com" in client.get("/").get_data(as_text=True)
+    with app.app_context():
+        user = db.session.get(User, "po")
+        assert (user.name, user.email, user.registered) == ("Dragon Warrior", "dragon@example.com", registered)
+        assert db.session.query(User).count() == 1
+
+
+def test_sqlite_is_tuned(app) -> None:
+    """Connections use write-ahead logging and wait for locks"""
+    with app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.exec_driver_sql("pragma journal_mode;").scalar() == "wal"
+            assert connection.exec_driver_sql("pragma busy_timeout;").scalar() == 5000
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_server_side_sessions(app, backend, monkeypatch) -> None:
+    """Sessions are written only when they change and logging out revokes them"""
+    app = create_app({**app.config, "SESSION_BACKEND": backend})
+    store = app.session_interface.store
+    saves = []
+    save = store.save
+    monkeypatch.setattr(store, "save", lambda sid, *args: saves.append(sid) or save(sid, *args))
+    client = app.test_client()
+    assert "session" not in client.get("/").headers.get("Set-Cookie", "")
+    assert len(store) == 0
+
+    client.get("/auth/login/callback?code=po")
+    sid = client.get_cookie("session").value
+    assert len(sid) < 64
+    for _ in range(3):
+        response = client.get("/")
+        assert "po@example.com" in response.get_data(as_text=True)
+        assert "Set-Cookie" not in response.headers
+    assert saves == [sid]
+
+    client.get("/auth/logout")
+    assert len(store) == 0
+    client.set_cookie("session", sid)
+    assert "po@example.com" not in client.get("/").get_data(as_text=True)
+
+
+def test_session_id_changes_on_login(app) -> None:
+    """A session id planted before logging in is dropped"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["next"] = "/"
+    planted = client.get_cookie("session").value
+    client.get("/auth/login/callback?code=po")
+    assert client.get_cookie("session").value != planted
+    assert app.session_interface.store.load(planted) is None
+
+
+def test_session_reads_vary_on_cookie(app) -> None:
+    """Pages that only read the session are not cached across users"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    response = client.get("/")
+    assert "po@example.com" in response.get_data(as_text=True)
+    assert "Set-Cookie" not in response.headers
+    assert "Cookie" in response.headers.get("Vary", "")
+
+
+def test_logout_revokes_the_session(app) -> None:
+    """Logging out revokes the session id even if the session holds more than the login"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    with client.session_transaction() as session:
+        session["theme"] = "bamboo"
+    sid = client.get_cookie("session").value
+    client.get("/auth/logout")
+    assert app.session_interface.store.load(sid) is None
+    client.set_cookie("session", sid)
+    assert "po@example.com" not in client.get("/").get_data(as_text=True)
+
+
+def test_sessions_expire(tmp_path, monkeypatch) -> None:
+    """Expired sessions are not loaded and are swept in batches"""
+    store = SQLiteStore(tmp_path / "sessions.db", sweep_interval=60, sweep_batch=2)
+    now = time.time()
+    for idx in range(5):
+        store.save(f"old-{idx}", "{}", now + 10)
+    store.save("new", "{}", now + 3600)
+    monkeypatch.setattr(time, "time", lambda: now + 20)
+    assert store.load("old-0") is None
+    assert store.load("new") == "{}"
+    assert [store.sweep() for _ in range(4)] == [2, 2, 1, 0]
+    assert len(store) == 1
+
+
+def test_unknown_session_backend(app) -> None:
+    """Only known session backends are accepted"""
+    with pytest.raises(ValueError):
+        create_app({**app.config, "SESSION_BACKEND": "redis"})
+
+
+def test_avatars_are_stored(app, provider) -> None:
+    """Every size of a picture is fetched once and then served from disk with validators"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    page = client.get("/").get_data(as_text=True)
+    url = page.split('<img src="')[1].split('"')[0]
+    assert url.startswith("/avatar/po?size=96&v=")
+
+    response = client.get(url)
+    assert (response.status_code, response.mimetype) == (200, "image/png")
+    assert response.data.startswith(b"\x89PNG")
+    assert {"public", "immutable", "max-age=31536000"} <= set(response.headers["Cache-Control"].split(", "))
+    assert client.get(url, headers={"If-None-Match": response.headers["ETag"]}).status_code == 304
+    assert client.get(url).data == response.data
+    assert client.get("/avatar/po?size=48", follow_redirects=True).data != response.data
+    assert provider.config["calls"]["picture"] == 2
+    assert len(list(pathlib.Path(app.config["AVATAR_DIR"]).iterdir())) == 2
+
+    assert client.get("/avatar/po?size=50").status_code == 404
+    assert client.get("/avatar/tai-lung").status_code == 404
+
+
+def test_unversioned_avatars_are_redirected(app) -> None:
+    """Only the URL with the current picture version is cached for a year"""
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    for url in ("/avatar/po?size=48", "/avatar/po?size=48&v=outdated"):
+        response = client.get(url)
+        assert response.status_code == 302
+        assert "immutable" not in response.headers.get("Cache-Control", "")
+        assert response.location.startswith("/avatar/po?size=48&v=")
+        assert response.location != url
+        assert "immutable" in client.get(response.location).headers["Cache-Control"]
+
+
+def test_avatar_fetches_are_coalesced(app, provider) -> None:
+    """Concurrent requests for a new picture wait for a single fetch"""
+    provider.config["PICTURE_DELAY"] = 0.2
+    app.test_client().get("/auth/login/callback?code=po")
+    with serve(app) as url:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            responses = list(executor.map(lambda _: requests.get(f"{url}/avatar/po", timeout=5), range(16)))
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert provider.config["calls"]["picture"] == 1
+
+
+def test_missing_avatar(app, provider) -> None:
+    """A picture that cannot be fetched is reported as a bad gateway"""
+    provider.config["profiles"]["po"] = {"picture": f"{provider.config['url']}/missing=s96-c"}
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    assert client.get("/avatar/po", follow_redirects=True).status_code == 502
+    assert client.get("/avatar/po", follow_redirects=True).status_code == 502
+    assert app.config["avatars"].fetches == 1
+
+
+def test_avatar_waiters_time_out(app) -> None:
+    """Requests waiting too long for another fetch are reported as a bad gateway"""
+    avatars = app.config["avatars"]
+    avatars.timeout = 0.05
+    client = app.test_client()
+    client.get("/auth/login/callback?code=po")
+    url = client.get("/avatar/po").location
+    with app.app_context():
+        picture = db.session.get(User, "po").picture
+    # Another request is fetching the picture and never finishes
+    avatars._pending[avatars.directory / f"{avatars.version(picture)}-96"] = Future()
+    assert client.get(url).status_code == 502
+    assert avatars.fetches == 0
+
+
+def test_admins_are_matched_exactly(app) -> None:
+    """Admins are listed by whole email, in any case, as they come from .env"""
+    admins = create_app({**app.config, "ADMINS": "master-shifu@example.com, PO@example.com"})
+    assert admins.config["ADMINS"] == {"master-shifu@example.com", "po@example.com"}
+    client = admins.test_client()
+    client.get("/auth/login/callback?code=u")
+    assert client.get("/admin/users.ndjson").status_code == 403
+    client.get("/auth/login/callback?code=po")
+    assert client.get("/admin/users.ndjson").status_code == 200
+
+
+def test_export_users(app) -> None:
+    """Admins export users in batches as NDJSON or CSV, optionally by registration time"""
+    app.config.update(ADMINS=frozenset({"po@example.com"}), EXPORT_BATCH_SIZE=4)
+    client = app.test_client()
+    client.get("/auth/login/callback?code=tigress")
+    assert client.get("/admin/users.ndjson").status_code == 403
+    client.get("/auth/login/callback?code=po")
+    with app.app_context():
+        start = datetime.datetime(2025, 1, 1)
+        db.session.add_all(
+            User(id=f"panda-{idx}", email=f"panda-{idx}@example.com", name="Panda", registered=start)
+            for idx in range(10)
+        )
+        db.session.commit()
+
+    response = client.get("/admin/users.ndjson")
+    assert response.is_streamed and response.mimetype == "application/x-ndjson"
+    users = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [user["id"] for user in users] == sorted(f"panda-{idx}" for idx in range(10)) + ["tigress", "po"]
+    assert set(users[0]) == {"id", "email", "name", "picture", "registered"}
+
+    rows = list(csv.DictReader(client.get("/admin/users.csv?until=2025-01-02").get_data(as_text=True).splitlines()))
+    assert len(rows) == 10 and rows[0]["registered"] == "2025-01-01T00:00:00"
+    assert client.get("/admin/users.ndjson?since=2025-01-02").get_data(as_text=True).count("\n") == 2
+    assert client.get("/admin/users.ndjson?since=yesterday").status_code == 400
+    assert client.get("/admin/users.xml").status_code == 404
+    with app.app_context():
+        with db.engine.connect() as connection:
+            indexes = connection.exec_driver_sql("pragma index_list('user');").all()
+            assert "ix_user_registered" in [index[1] for index in indexes]
+
+
+def test_audit_log(app, monkeypatch) -> None:
+    """Logins and logouts are recorded and can be queried by admins"""
+    app.config["ADMINS"] = frozenset({"po@example.com"})
+    client = app.test_client()
+    client.get("/auth/login/callback?code=tigress", headers={"User-Agent": "Jade Palace"})
+    client.get("/auth/logout")
+    client.get("/auth/login/callback?code=po&error=access_denied")
+    start = datetime.datetime.now()
+    client.get("/auth/login/callback?code=po")
+    assert app.config["audit"].flush(timeout=5)
+
+    events = client.get("/admin/audit").json
+    assert [(event["event"], event["user_id"]) for event in events] == [
+        ("login", "po"),
+        ("login_failed", None),
+        ("logout", "tigress"),
+        ("login", "tigress"),
+    ]
+    assert events[-1]["user_agent"] == "Jade Palace"
+    assert len(client.get(f"/admin/audit?since={start.isoformat()}").json) == 1
+    assert len(client.get(f"/admin/audit?until={start.isoformat()}&event=login").json) == 1
+    assert len(client.get("/admin/audit?user=tigress").json) == 2
+    assert len(client.get("/admin/audit?limit=2").json) == 2
+    assert len(client.get("/admin/audit?limit=-1").json) == 1
+    monkeypatch.setattr("exercises.authorization.panda.admin.MAX_AUDIT_EVENTS", 3)
+    assert len(client.get("/admin/audit?limit=100").json) == 3
+
+
+def test_audit_log_batches_and_drains(tmp_path) -> None:
+    """Events are written in batches and closing writes the rest"""
+    log = AuditLog(tmp_path / "audit.db", batch_size=3, flush_interval=60)
+    for idx in range(7):
+        log.record("login", f"panda-{idx}")
+    log.close(timeout=5)
+    assert (log.written, log.batches) == (7, 3)
+    assert len(log.events()) == 7
+    assert log.events(user_id="panda-6")[0]["event"] == "login"
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_login_attempts_are_limited(app, provider, backend) -> None:
+    """A client gets a burst of login attempts and then has to wait"""
+    app = create_app({**app.config, "RATE_LIMIT_BACKEND": backend, "RATE_LIMITS": {"ip": (0.01, 3)}})
+    client = app.test_client()
+    assert [client.get("/auth/login").status_code for _ in range(3)] == [302] * 3
+    response = client.get("/auth/login/callback?code=po")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 100
+    assert provider.config["calls"] == {}
+    other = app.test_client()
+    assert other.get("/auth/login", environ_base={"REMOTE_ADDR": "10.0.0.8"}).status_code == 302
+
+
+def test_token_buckets(tmp_path, monkeypatch) -> None:
+    """Buckets refill over time, memory is bounded, and SQLite buckets are shared"""
+    now = 1_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+    limiter = RateLimiter(MemoryBuckets(maxsize=2), {"account": (1, 2)})
+    assert [limiter.hit("account", "po") for _ in range(3)] == [0, 0, 1]
+    now += 0.5
+    assert limiter.hit("account", "po") == pytest.approx(0.5)
+    now += 0.5
+    assert limiter.hit("account", "po") == 0
+    assert limiter.hit("ip", "po") == 0
+    for user in ("tigress", "monkey", "viper"):
+        limiter.hit("account", user)
+    assert len(limiter.backend) == 2
+
+    workers = [RateLimiter(SQLiteBuckets(tmp_path / "ratelimit.db"), {"account": (1, 2)}) for _ in range(2)]
+    assert [worker.hit("account", "po") for worker in workers * 2] == [0, 0, 1, 1]
+    now += 60
+    workers[0].hit("account", "tigress")
+    assert len(workers[1].backend) == 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Testing PandAuth provider discovery
+
+@author: Roman Yasinovskyy
+@version: 2025.12
+"""
+
+import pathlib
+import socket
+import sys
+import time
+from importlib import util
+
+import pytest
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    from exercises.authorization.mock_provider import create_provider, serve
+    from exercises.authorization.panda import create_app, http
+    from exercises.authorization.panda.oidc import FALLBACK_CONFIG, DiscoveryCache, make_session
+
+
+def wait_for(condition, timeout: float = 5) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@pytest.fixture(name="provider")
+def fixture_provider():
+    """Run the stand-in provider"""
+    provider = create_provider()
+    with serve(provider) as url:
+        provider.config["url"] = url
+        yield provider
+
+
+@pytest.fixture(name="silent_url")
+def fixture_silent_url():
+    """Discovery URL of a server that accepts connections but never answers"""
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        yield f"http://127.0.0.1:{listener.getsockname()[1]}/.well-known/openid-configuration"
+
+
+def test_boot_does_not_block(tmp_path, silent_url) -> None:
+    """The app is created with the fallback configuration while the provider is unresponsive"""
+    start = time.perf_counter()
+    app = create_app(
+        {
+            "GOOGLE_CLIENT_ID": "panda",
+            "GOOGLE_DISCOVERY_URL": silent_url,
+            "DISCOVERY_CACHE": tmp_path / "discovery.json",
+            "DATABASE": tmp_path / "users.db",
+        }
+    )
+    assert time.perf_counter() - start < 1
+    assert app.config["discovery"].get() == FALLBACK_CONFIG
+
+
+def test_discovery_is_refreshed_and_saved(tmp_path, provider) -> None:
+    """A missing document is fetched in the background and later loaded from disk"""
+    url = f"{provider.config['url']}/.well-known/openid-configuration"
+    cache = DiscoveryCache(url, tmp_path / "discovery.json", make_session(), ttl=60, fallback=FALLBACK_CONFIG)
+    assert cache.get() == FALLBACK_CONFIG
+    assert wait_for(lambda: cache.get()["issuer"] == provider.config["url"])
+
+    restored = DiscoveryCache(url, tmp_path / "discovery.json", make_session(), ttl=60)
+    assert not restored.is_stale
+    assert restored.get()["token_endpoint"] == f"{provider.config['url']}/token"
+    assert provider.config["calls"]["discovery"] == 1
+
+
+def test_stale_discovery_is_served_while_refreshing(tmp_path, provider) -> None:
+    """An expired document keeps being served until the refresh completes"""
+    url = f"{provider.config['url']}/.well-known/openid-configuration"
+    cache = DiscoveryCache(url, tmp_path / "discovery.json", make_session(), ttl=0, fallback=FALLBACK_CONFIG)
+    for _ in range(10):
+        cache.get()
+    assert wait_for(lambda: "discovery" in provider.config["calls"])
+    assert provider.config["calls"]["discovery"] < 10
+
+
+def test_session_is_pooled_with_retries() -> None:
+    """Requests to the provider share a connection pool and are retried"""
+    adapter = http.get_adapter("https://oauth2.googleapis.com/token")
+    assert adapter._pool_maxsize == 10
+    assert adapter.max_retries.total == 3
+    assert "POST" not in adapter.max_retries.allowed_methods
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Shared fixtures of the `geo` tests
+
+@author: Roman Yasinovskyy
+@version: 2025.11
+"""
+
+import pathlib
+import shutil
+
+import pytest
+
+DB_FILE = pathlib.Path(__file__).parents[2] / "exercises/geo/data/world.sqlite3"
+
+
+@pytest.fixture(name="db_copy")
+def fixture_db_copy(tmp_path, monkeypatch):
+    """Point the app to a disposable copy of the database"""
+    db_copy = tmp_path / "world.sqlite3"
+    shutil.copy(DB_FILE, db_copy)
+    monkeypatch.setenv("FLASK_DB_FILE", str(db_copy))
+    return db_copy
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Testing `geo` JSON API
+
+@author: Roman Yasinovskyy
+@version: 2025.11
+"""
+
+import csv
+import io
+import json
+import pathlib
+import sys
+import time
+from importlib import util
+
+import pytest
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    from exercises.geo.alex import create_app
+    from exercises.geo.alex.retrieval import _country_document, _fetch_all, get_data_from_db
+
+
+@pytest.fixture(name="client", autouse=True)
+def fixture_client():
+    """Create the client fixture"""
+    app = create_app()
+    with app.test_client() as test_client:
+        with app.app_context():
+            yield test_client
+
+
+def test_get_countries(client) -> None:
+    """All countries are listed"""
+    response = client.get("/api/v1/countries")
+    assert response.status_code == 200
+    assert len(response.get_json()["countries"]) == 250
+
+
+@pytest.mark.parametrize(
+    "name, capital",
+    [
+        ("Côte d'Ivoire", "Yamoussoukro"),
+        ("Ukraine", "Kyiv"),
+        ("United States", "Washington"),
+    ],
+)
+def test_get_country(client, name: str, capital: str) -> None:
+    """Country record and its cities are available"""
+    country = client.get(f"/api/v1/countries/{name}").get_json()["country"]
+    cities = client.get(f"/api/v1/countries/{name}/cities").get_json()["cities"]
+    assert country["name"] == name
+    assert capital in {city["name"] for city in cities if city["id"] == country["capital"]}
+
+
+@pytest.mark.parametrize(
+    "route",
+    [
+        "/api/v1/countries/Aldovia",
+        "/api/v1/countries/Wakanda/cities",
+        "/api/v1/regions/Eurasia",
+        "/api/v1/subregions/Middle East",
+    ],
+)
+def test_get_fictional(client, route: str) -> None:
+    """Missing records are reported as JSON 404"""
+    response = client.get(route)
+    assert response.status_code == 404
+    assert "error" in response.get_json()
+
+
+def test_unknown_names_are_not_cached(client) -> None:
+    """Names outside the lookups are rejected before they can grow the caches"""
+    client.get("/api/v1/countries/Ukraine")
+    client.get("/country/Ukraine/cities")
+    queries, documents = _fetch_all.cache_info().currsize, _country_document.cache_info().currsize
+    for number in range(20):
+        for route in ("countries/Aldovia{}", "countries/Aldovia{}/cities", "regions/Eurasia{}", "subregions/Midgard{}"):
+            assert client.get("/api/v1/" + route.format(number)).status_code == 404
+        assert client.get(f"/country/Aldovia{number}/cities").status_code == 404
+    assert _fetch_all.cache_info().currsize == queries
+    assert _country_document.cache_info().currsize == documents
+
+
+@pytest.mark.parametrize(
+    "kind, name, results",
+    [
+        ("regions", "Africa", 59),
+        ("regions", "Oceania", 27),
+        ("subregions", "Caribbean", 28),
+        ("subregions", "Western Europe", 9),
+    ],
+)
+def test_get_region_countries(client, kind: str, name: str, results: int) -> None:
+    """Region and subregion country lists"""
+    assert len(client.get(f"/api/v1/{kind}/{name}").get_json()["countries"]) == results
+
+
+@pytest.mark.parametrize(
+    "prefix, expected",
+    [
+        ("cote", "Côte d'Ivoire"),
+        ("COTE D", "Côte d'Ivoire"),
+        ("ivoire", "Côte d'Ivoire"),
+        ("reun", "Réunion"),
+        ("kyi", "Kyiv"),
+        ("sao", "São Paulo"),
+    ],
+)
+def test_autocomplete(client, prefix: str, expected: str) -> None:
+    """Matching ignores case and accents"""
+    suggestions = client.get(f"/api/v1/autocomplete?q={prefix}").get_json()["suggestions"]
+    assert expected in [suggestion["name"] for suggestion in suggestions]
+
+
+def test_autocomplete_ranking(client) -> None:
+    """The most populous places come first"""
+    suggestions = client.get("/api/v1/autocomplete?q=new&kind=city&limit=3").get_json()["suggestions"]
+    assert [suggestion["name"] for suggestion in suggestions] == ["New York", "New Orleans", "New Haven"]
+    assert {suggestion["kind"] for suggestion in suggestions} == {"city"}
+
+
+@pytest.mark.parametrize("prefix", ["", "zzzz", "Aldovia"])
+def test_autocomplete_no_match(client, prefix: str) -> None:
+    """Unknown prefixes yield no suggestions"""
+    assert client.get(f"/api/v1/autocomplete?q={prefix}").get_json()["suggestions"] == []
+
+
+def test_top_gdp_per_capita(client) -> None:
+    """Richest countries per capita come first"""
+    countries = client.get("/api/v1/analytics/top/gdp_per_capita_2023?n=3").get_json()["countries"]
+    assert [country["name"] for country in countries] == ["Luxembourg", "Ireland", "Switzerland"]
+    assert [country["rank"] for country in countries] == [1, 2, 3]
+
+
+@pytest.mark.parametrize(
+    "route, expected",
+    [
+        ("/api/v1/analytics/growth/population/2000/2023?n=1&region=Europe", "Cyprus"),
+        ("/api/v1/analytics/growth/population/2000/2023?n=1&order=asc", "Bhutan"),
+        ("/api/v1/analytics/top/life_expectancy?n=1&region=Western Europe", "Monaco"),
+    ],
+)
+def test_ranking(client, route: str, expected: str) -> None:
+    """Rankings honor regions and order"""
+    assert client.get(route).get_json()["countries"][0]["name"] == expected
+
+
+def test_percentiles(client) -> None:
+    """Percentile ranks are computed within a subregion"""
+    countries = client.get("/api/v1/analytics/percentiles/life_expectancy?region=Western Europe").get_json()[
+        "countries"
+    ]
+    assert len(countries) == 9
+    ranks = {country["name"]: country["percentile"] for country in countries}
+    assert min(ranks, key=ranks.get) == "Germany"
+    assert max(ranks, key=ranks.get) == "Monaco"
+    assert all(0 < rank < 100 for rank in ranks.values())
+
+
+@pytest.mark.parametrize(
+    "route",
+    [
+        "/api/v1/analytics/top/happiness",
+        "/api/v1/analytics/top/density?region=Atlantis",
+        "/api/v1/analytics/growth/population/2023/2000",
+        "/api/v1/analytics/growth/population/1999/2023",
+        "/api/v1/analytics/percentiles/area?region=Eurasia",
+    ],
+)
+def test_analytics_invalid(client, route: str) -> None:
+    """Unknown metrics, years, and regions are reported as JSON 404"""
+    assert client.get(route).status_code == 404
+
+
+def test_query_stats_disabled(client) -> None:
+    """Debug endpoints are off outside of debug mode"""
+    assert client.get("/api/v1/debug/queries").status_code == 404
+
+
+def test_query_stats(client) -> None:
+    """Every query is timed and slow ones are explained"""
+    app = client.application
+    app.config["DEBUG_ENDPOINTS"] = True
+    app.config["query_log"].slow_ms = 0
+    query = "select name from city where population > ? order by population desc;"
+    assert len(get_data_from_db(query, (12_345_678,))) == len(get_data_from_db(query, (12_345_678,)))
+    report = client.get("/api/v1/debug/queries").get_json()
+    stats = next(item for item in report["queries"] if item["query"] == query)
+    assert (stats["calls"], stats["hits"], stats["misses"]) == (2, 1, 1)
+    assert stats["rows"] > 0
+    slow = next(item for item in report["slow_queries"] if item["query"] == query)
+    assert slow["params"] == [12_345_678]
+    assert any("city" in line for line in slow["plan"])
+
+
+def test_export_ndjson(client) -> None:
+    """Every city is exported as a JSON line"""
+    response = client.get("/api/v1/export/cities.ndjson")
+    assert response.is_streamed
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 3821
+    assert set(json.loads(lines[0])) == {"id", "name", "country_code", "admin_region", "population"}
+
+
+def test_export_csv(client) -> None:
+    """Every city is exported as a CSV row"""
+    response = client.get("/api/v1/export/cities.csv")
+    assert response.is_streamed
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert len(rows) == 3821
+
+
+def test_compare(client) -> None:
+    """Countries are listed in the requested order with missing ones reported"""
+    response = client.get(
+        "/api/v1/compare?names=ukraine, Wakanda,Saint Helena, Ascension and Tristan da Cunha&names=Poland,Ukraine"
+    )
+    assert response.status_code == 200
+    countries = response.get_json()["countries"]
+    assert [item["name"] for item in countries] == [
+        "ukraine",
+        "Wakanda",
+        "Saint Helena, Ascension and Tristan da Cunha",
+        "Poland",
+    ]
+    assert countries[0]["country"]["capital_name"] == "Kyiv"
+    assert countries[1]["country"] is None
+    assert countries[1]["error"] == "Country 'Wakanda' was not found."
+    assert countries[3]["country"]["code3"] == "POL"
+
+
+def test_compare_is_batched(client) -> None:
+    """Only the countries that are not cached yet are queried, all in one query"""
+    client.get("/api/v1/compare?names=Chad,Niger")
+    query_log = client.application.config["query_log"]
+    query_log.reset()
+    response = client.get("/api/v1/compare?names=Chad,Niger,Mali,Sudan")
+    assert len(response.get_json()["countries"]) == 4
+    (stats,) = [query for query in query_log.report()["queries"] if "where c.name in" in query["query"]]
+    assert stats["misses"] == 1
+    assert stats["rows"] <= 2
+
+
+def test_compare_invalid(client) -> None:
+    """GET should return 404 Not Found"""
+    assert client.get("/api/v1/compare").status_code == 404
+    names = ",".join(client.application.config["countries"][:21])
+    assert client.get(f"/api/v1/compare?names={names}").status_code == 404
+
+
+def test_compare_long_list(client) -> None:
+    """Very long lists are rejected without splitting them into names"""
+    start = time.perf_counter()
+    response = client.get("/api/v1/compare?names=" + ",".join(["Saint Helena"] * 100_000))
+    assert response.status_code == 404
+    assert time.perf_counter() - start < 1
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
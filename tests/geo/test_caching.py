@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Testing `geo` HTTP validators and response cache
+
+@author: Roman Yasinovskyy
+@version: 2025.11
+"""
+
+import json
+import pathlib
+import sqlite3
+import sys
+from importlib import util
+
+import pytest
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    import exercises.geo.alex
+    from exercises.geo.alex import create_app
+    from exercises.geo.alex.snapshot import snapshot_path
+
+@pytest.fixture(name="app")
+def fixture_app(db_copy):
+    """Create the app fixture"""
+    return create_app()
+
+
+@pytest.mark.parametrize("route", ["/", "/region/Europe", "/subregion?name=Caribbean", "/country/Chad"])
+def test_etag_revalidation(app, route: str) -> None:
+    """Unchanged pages should be revalidated as 304 Not Modified"""
+    client = app.test_client()
+    response = client.get(route)
+    assert response.status_code == 200
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    revalidated = client.get(route, headers={"If-None-Match": response.headers["ETag"]})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == response.headers["ETag"]
+
+
+def test_last_modified_revalidation(app) -> None:
+    """Pages should not be modified since the database was"""
+    client = app.test_client()
+    response = client.get("/country/Chad")
+    revalidated = client.get("/country/Chad", headers={"If-Modified-Since": response.headers["Last-Modified"]})
+    assert revalidated.status_code == 304
+
+
+def test_etag_differs_by_query(app) -> None:
+    """Every URL has its own validator"""
+    client = app.test_client()
+    assert client.get("/country?name=Chad").headers["ETag"] != client.get("/country?name=Peru").headers["ETag"]
+
+
+@pytest.mark.parametrize("route", ["/country/Aldovia", "/region/Eurasia"])
+def test_not_found_is_cached(app, route: str) -> None:
+    """Not Found pages are cached but never revalidated"""
+    client = app.test_client()
+    first = client.get(route)
+    assert first.status_code == 404
+    assert "ETag" not in first.headers
+    assert len(app.config["response_cache"]) == 1
+    second = client.get(route, headers={"If-None-Match": "*"})
+    assert second.status_code == 404
+    assert second.get_data() == first.get_data()
+
+
+def test_cache_is_bounded(app) -> None:
+    """The least recently used pages are evicted"""
+    app.config["response_cache"].maxsize = 3
+    client = app.test_client()
+    for name in ["Chad", "Peru", "Fiji", "Oman", "Cuba"]:
+        client.get(f"/country/{name}")
+    assert len(app.config["response_cache"]) == 3
+
+
+def test_cache_is_invalidated(app, db_copy) -> None:
+    """Changing the database drops cached pages and validators"""
+    client = app.test_client()
+    response = client.get("/country/Chad")
+    assert b"Ndjamena" not in response.get_data()
+    with sqlite3.connect(db_copy) as connection:
+        connection.execute("update city set name='Ndjamena' where name=?;", ("N’Djamena",))
+    connection.close()
+    changed = client.get("/country/Chad", headers={"If-None-Match": response.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != response.headers["ETag"]
+    assert b"Ndjamena" in changed.get_data()
+
+
+def test_snapshot_is_reused(app, db_copy, monkeypatch) -> None:
+    """Later apps load the lookups instead of building them"""
+    assert snapshot_path(db_copy).exists()
+
+    def fail():
+        raise AssertionError("Lookups should come from the snapshot")
+
+    monkeypatch.setattr(exercises.geo.alex, "query_lookups", fail)
+    second = create_app()
+    assert second.config["countries"] == app.config["countries"]
+    assert second.config["search_index"].lookup("kyi")[0].name == "Kyiv"
+
+
+def test_snapshot_is_keyed_on_contents(app, db_copy) -> None:
+    """Changing the database makes the snapshot stale"""
+    with sqlite3.connect(db_copy) as connection:
+        connection.execute("update country set name='Chadia' where name='Chad';")
+    connection.close()
+    second = create_app()
+    assert "Chadia" in second.config["countries"]
+    assert "Chad" not in second.config["countries"]
+
+
+def test_snapshot_is_verified(app, db_copy) -> None:
+    """A snapshot saved for other contents is ignored, whatever its file times"""
+    snapshot = json.loads(snapshot_path(db_copy).read_text(encoding="utf-8"))
+    snapshot["digest"] = "0" * 64
+    snapshot["lookups"]["countries"] = ["Atlantis"]
+    snapshot_path(db_copy).write_text(json.dumps(snapshot), encoding="utf-8")
+    second = create_app()
+    assert "Atlantis" not in second.config["countries"]
+    assert json.loads(snapshot_path(db_copy).read_text(encoding="utf-8"))["digest"] == app.config["DB_VERSION"].digest
+
+
+@pytest.mark.parametrize("mode", ["cache", "nocache", "pool", "memory"])
+def test_retrieval_modes(db_copy, monkeypatch, mode: str) -> None:
+    """Every retrieval mode serves the same pages and sees database changes"""
+    monkeypatch.setenv("FLASK_RETRIEVAL_MODE", mode)
+    monkeypatch.setenv("FLASK_POOL_SIZE", "2")
+    app = create_app()
+    assert ("connection_pool" in app.config) == (mode in ("pool", "memory"))
+    client = app.test_client()
+    response = client.get("/country/Chad")
+    assert response.status_code == 200
+    assert "N’Djamena".encode() in response.get_data()
+    with sqlite3.connect(db_copy) as connection:
+        connection.execute("update city set name='Ndjamena' where name=?;", ("N’Djamena",))
+    connection.close()
+    assert b"Ndjamena" in client.get("/country/Chad").get_data()
+
+
+def test_unknown_retrieval_mode(db_copy, monkeypatch) -> None:
+    """Unknown retrieval modes are rejected on startup"""
+    monkeypatch.setenv("FLASK_RETRIEVAL_MODE", "magic")
+    with pytest.raises(ValueError):
+        create_app()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -18,7 +18,7 @@ except ModuleNotFoundError:
     sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
 finally:
     from exercises.geo.alex import create_app
-    from exercises.geo.alex.retrieval import get_data_from_db
+    from exercises.geo.alex.retrieval import get_country_document, get_data_from_db
 
 
 @pytest.fixture(name="app", autouse=True)
@@ -156,5 +156,32 @@ def test_query_fictional_country(name: str, results: int) -> None:
     assert len(get_data_from_db(query, (name,))) == results
 
 
+@pytest.mark.parametrize(
+    "name, cities, capital",
+    [
+        ("Côte d'Ivoire", 14, "Yamoussoukro"),
+        ("Réunion", 2, "Saint-Denis"),
+        ("Ukraine", 25, "Kyiv"),
+        ("United States", 182, "Washington"),
+        ("Antarctica", 0, None),
+    ],
+)
+def test_country_document(name: str, cities: int, capital: str | None) -> None:
+    """Read a country with its cities"""
+    document = get_country_document(name)
+    assert document.name == name
+    assert len(document.cities) == cities
+    assert [city["name"] for city in document.cities if city["id"] == document.capital][:1] == (
+        [capital] if capital else []
+    )
+    assert get_country_document(name) is document
+
+
+@pytest.mark.parametrize("name", ["Aldovia", "Wakanda", "United States of America"])
+def test_fictional_country_document(name: str) -> None:
+    """Fictional countries have no document"""
+    assert get_country_document(name) is None
+
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
\ No newline at end of file
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Testing `geo` bulk data import
+
+@author: Roman Yasinovskyy
+@version: 2025.11
+"""
+
+import json
+import pathlib
+import sqlite3
+import sys
+from importlib import util
+
+import pytest
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    from exercises.geo.alex import create_app
+    from exercises.geo.alex.schema import missing_indexes
+
+
+@pytest.fixture(name="app")
+def fixture_app(db_copy):
+    """Create the app fixture"""
+    return create_app()
+
+
+@pytest.fixture(name="countries_csv")
+def fixture_countries_csv(tmp_path):
+    """A country that does not exist yet"""
+    source = tmp_path / "countries.csv"
+    source.write_text(
+        "name,official_name,code2,code3,capital,continental_region,subregion,population_2023\n"
+        "Aldovia,Kingdom of Aldovia,XA,XAL,1,Europe,Eastern Europe,1000000\n",
+        encoding="utf-8",
+    )
+    return source
+
+
+@pytest.fixture(name="cities_ndjson")
+def fixture_cities_ndjson(tmp_path):
+    """Many cities of the new country"""
+    source = tmp_path / "cities.ndjson"
+    with source.open("w", encoding="utf-8") as data:
+        data.write(json.dumps({"id": 1, "name": "Aldovia City", "country_code": "XAL", "population": 500_000}) + "\n")
+        for city_id in range(2, 2_001):
+            data.write(json.dumps({"id": city_id, "name": f"Village {city_id}", "country_code": "XAL"}) + "\n")
+    return source
+
+
+def count(db_file: pathlib.Path, query: str) -> int:
+    with sqlite3.connect(db_file) as connection:
+        result = connection.execute(query).fetchone()[0]
+    connection.close()
+    return result
+
+
+def test_import_adds_rows(app, db_copy, countries_csv, cities_ndjson) -> None:
+    """Imported rows are added to the existing ones"""
+    result = app.test_cli_runner().invoke(
+        args=["import-data", "--countries", str(countries_csv), "--cities", str(cities_ndjson), "--batch-size", "300"]
+    )
+    assert result.exit_code == 0, result.output
+    assert "city: 2,000 rows" in result.output
+    assert count(db_copy, "select count(*) from country;") == 251
+    assert count(db_copy, "select count(*) from city;") == 3821 + 2000
+    assert count(db_copy, "select count(*) from sqlite_master where name='city_country_name';") == 1
+    assert not db_copy.with_name("world.sqlite3.importing").exists()
+
+
+def test_import_replaces_rows(app, db_copy, cities_ndjson) -> None:
+    """Replacing a table drops its old rows only"""
+    result = app.test_cli_runner().invoke(args=["import-data", "--cities", str(cities_ndjson), "--replace"])
+    assert result.exit_code == 0, result.output
+    assert count(db_copy, "select count(*) from country;") == 250
+    assert count(db_copy, "select count(*) from city;") == 2000
+
+
+def test_import_keeps_schema(app, db_copy, cities_ndjson) -> None:
+    """Views, triggers, indexes, and other tables of the database survive an import"""
+    with sqlite3.connect(db_copy) as connection:
+        connection.execute("create table note (id integer primary key, text text);")
+        connection.execute("insert into note (text) values ('kept');")
+        connection.execute("create index note_text on note (text);")
+        connection.execute("create view big_city as select * from city where population > 1000000;")
+        connection.execute(
+            "create trigger city_note after delete on city begin insert into note (text) values (old.name); end;"
+        )
+    connection.close()
+    result = app.test_cli_runner().invoke(args=["import-data", "--cities", str(cities_ndjson), "--replace"])
+    assert result.exit_code == 0, result.output
+    names = "('note', 'note_text', 'big_city', 'city_note')"
+    assert count(db_copy, f"select count(*) from sqlite_master where name in {names};") == 4
+    assert count(db_copy, "select count(*) from note;") == 1
+    assert count(db_copy, "select count(*) from big_city;") == 0
+
+
+def test_import_rejects_empty_batches(app, db_copy, cities_ndjson) -> None:
+    """A batch holds at least one row"""
+    result = app.test_cli_runner().invoke(args=["import-data", "--cities", str(cities_ndjson), "--batch-size", "0"])
+    assert result.exit_code != 0
+    assert "--batch-size" in result.output
+
+
+def test_import_is_picked_up(app, countries_csv, cities_ndjson) -> None:
+    """A running app serves the imported data on its next request"""
+    client = app.test_client()
+    assert client.get("/country/Aldovia").status_code == 404
+    app.test_cli_runner().invoke(
+        args=["import-data", "--countries", str(countries_csv), "--cities", str(cities_ndjson)]
+    )
+    response = client.get("/country/Aldovia")
+    assert response.status_code == 200
+    assert b"2000 cities of Aldovia" in response.get_data()
+    assert "Aldovia" in app.config["countries"]
+
+
+def test_create_indexes(app, db_copy, caplog) -> None:
+    """Indexes are built by a command, the app only warns about them"""
+    with sqlite3.connect(db_copy) as connection:
+        connection.execute("drop index if exists city_country_name;")
+        connection.execute("drop index if exists city_country_population;")
+    connection.close()
+    create_app()
+    assert "city_country_name" in caplog.text
+    assert count(db_copy, "select count(*) from sqlite_master where name like 'city_country_%';") == 0
+    result = app.test_cli_runner().invoke(args=["create-indexes"])
+    assert result.exit_code == 0, result.output
+    assert count(db_copy, "select count(*) from sqlite_master where name like 'city_country_%';") == 2
+
+
+def test_shipped_database_is_indexed() -> None:
+    """The database in the repository comes with the indexes the city pages rely on"""
+    assert not missing_indexes(pathlib.Path(__file__).parents[2] / "exercises/geo/data/world.sqlite3")
+
+
+def test_import_rejects_unknown_format(app, db_copy, tmp_path) -> None:
+    """Unsupported files leave the database untouched"""
+    source = tmp_path / "cities.xml"
+    source.write_text("<cities/>", encoding="utf-8")
+    before = db_copy.read_bytes()
+    result = app.test_cli_runner().invoke(args=["import-data", "--cities", str(source)])
+    assert result.exit_code != 0
+    assert db_copy.read_bytes() == before
+    assert not list(db_copy.parent.glob("*.importing*"))
+    assert not db_copy.with_name("world.sqlite3.importing").exists()
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])
@@ -6,7 +6,9 @@ Testing `geo` routes
 @version: 2025.11
 """
 
+import html
 import pathlib
+import re
 import sys
 from importlib import util
 
@@ -18,6 +20,7 @@ except ModuleNotFoundError:
     sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
 finally:
     from exercises.geo.alex import create_app
+    from exercises.geo.alex.retrieval import _fetch_all
 
 
 @pytest.fixture(name="client", autouse=True)
@@ -128,5 +131,99 @@ def test_get_fictional_country(client, country: str) -> None:
     assert client.get(f"/country/{country}").status_code == 404
 
 
+@pytest.mark.parametrize(
+    "route, option",
+    [
+        ("/country/Ukraine", '<option value="Ukraine" selected>Ukraine</option>'),
+        ("/country?name=Chad", '<option value="Chad" selected>Chad</option>'),
+        ("/region/Europe", '<option value="Europe" selected>Europe</option>'),
+        ("/subregion/Caribbean", '<option value="Caribbean" selected>Caribbean</option>'),
+    ],
+)
+def test_selected_option(client, route: str, option: str) -> None:
+    """Exactly one search option should be selected"""
+    page = client.get(route).get_data(as_text=True)
+    assert option in page
+    assert page.count(" selected>") == 1
+
+
+@pytest.mark.parametrize("sort", ["name", "population"])
+def test_city_pages(client, sort: str) -> None:
+    """Following the cursors should list every city exactly once"""
+    client.application.config["CITY_PAGE_SIZE"] = 50
+    page = client.get(f"/country/India?sort={sort}").get_data(as_text=True)
+    assert "233 cities of India" in page
+    rows = page.count("<tr class=")
+    assert rows == 50
+    populations = []
+    while match := re.search(r'data-next="([^"]+)"', page):
+        page = client.get(html.unescape(match.group(1))).get_data(as_text=True)
+        rows += page.count("<tr class=")
+        populations.extend(int(value.replace(",", "")) for value in re.findall(r"^\s*([\d,]+)\s*$", page, re.M))
+    assert rows == 233
+    if sort == "population":
+        assert populations and populations == sorted(populations, reverse=True)
+
+
+def test_city_pages_are_not_cached(client) -> None:
+    """Cursors come from clients, so the pages they select must not grow the query cache"""
+    client.application.config["CITY_PAGE_SIZE"] = 50
+    page = client.get("/country/India").get_data(as_text=True)
+    cached = _fetch_all.cache_info().currsize
+    while match := re.search(r'data-next="([^"]+)"', page):
+        page = client.get(html.unescape(match.group(1))).get_data(as_text=True)
+    assert _fetch_all.cache_info().currsize == cached
+
+
+def test_city_page_sorted_by_population(client) -> None:
+    """The most populous city comes first"""
+    page = client.get("/country/United States?sort=population").get_data(as_text=True)
+    assert page.index("New York") < page.index("Los Angeles") < page.index("Washington")
+
+
+@pytest.mark.parametrize(
+    "route",
+    [
+        "/country/India?sort=area",
+        "/country/India/cities?after=not-a-cursor",
+        "/country/Wakanda/cities?after=WyJBIiwgMV0=",
+    ],
+)
+def test_city_pages_invalid(client, route: str) -> None:
+    """GET should return 404 Not Found"""
+    assert client.get(route).status_code == 404
+
+
+@pytest.mark.parametrize(
+    "route, location",
+    [
+        ("/country/france", "/country/France"),
+        ("/country/COTE%20D%27IVOIRE", "/country/C%C3%B4te%20d'Ivoire"),
+        ("/country/united-states?sort=population", "/country/United%20States?sort=population"),
+        ("/country?name=ukraine", "/country/Ukraine"),
+        ("/region/europe", "/region/Europe"),
+        ("/subregion/CARIBBEAN", "/subregion/Caribbean"),
+        ("/subregion?name=south-eastern%20asia", "/subregion/South-eastern%20Asia"),
+    ],
+)
+def test_canonical_redirect(client, route: str, location: str) -> None:
+    """Other spellings of a name should permanently redirect to the canonical page"""
+    response = client.get(route)
+    assert response.status_code == 301
+    assert response.headers["Location"] == location
+    assert response.cache_control.max_age > 0
+    assert client.get(location).status_code == 200
+
+
+def test_compare(client) -> None:
+    """Compared countries are listed and missing ones are reported"""
+    response = client.get("/compare?names=Ukraine,Poland,Wakanda")
+    assert response.status_code == 200
+    page = response.get_data(as_text=True)
+    assert "Comparing 2 countries and territories" in page
+    assert "Kyiv" in page and "Warsaw" in page
+    assert "Country 'Wakanda' was not found." in page
+
+
 if __name__ == "__main__":
     pytest.main(["-v", __file__])
\ No newline at end of file
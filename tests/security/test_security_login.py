@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Testing password login of the security exercise
+
+@author: Roman Yasinovskyy
+@version: 2025.12
+"""
+
+import importlib
+import pathlib
+import sys
+import threading
+from importlib import util
+
+import pytest
+from passlib.context import CryptContext
+
+try:
+    util.find_spec("exercises." + pathlib.Path(__file__).parts[-2])
+except ModuleNotFoundError:
+    sys.path.append(f"{pathlib.Path(__file__).parents[2]}/")
+finally:
+    from exercises.security.hashing import HashingBusy, HashingService, calibrate
+
+
+def load_app():
+    """Import the app afresh, since it reads the environment on import"""
+    sys.modules.pop("exercises.security.app", None)
+    return importlib.import_module("exercises.security.app")
+
+
+@pytest.fixture(name="security")
+def fixture_security(monkeypatch):
+    """Load the app afresh with known passwords, cheap hashes, and in-memory login limits"""
+    monkeypatch.setenv("SECRET_KEY", "dragon-scroll")
+    monkeypatch.setenv("PASSWORD_ROUNDS", "1000")
+    monkeypatch.setenv("ALICE_PASSWORD", "wonderland")
+    monkeypatch.setenv("BOB_PASSWORD", "builder")
+    monkeypatch.delenv("RATE_LIMIT_DATABASE", raising=False)
+    module = load_app()
+    module.get_hasher()
+    yield module
+    module.hasher.close()
+
+
+@pytest.fixture(name="client")
+def fixture_client(security):
+    """Create the client fixture"""
+    return security.app.test_client()
+
+
+def test_login_and_logout(client) -> None:
+    """Users log in with their password, are greeted by name, and log out"""
+    assert client.get("/").location == "/login"
+    assert all(user in client.get("/login").get_data(as_text=True) for user in ("Alice", "Bob"))
+    response = client.post("/login", data={"username": "Alice", "password": "wonderland"})
+    assert response.location == "/"
+    assert "Hello, Alice!" in client.get("/").get_data(as_text=True)
+    assert client.post("/logout").location == "/login"
+    assert client.get("/").location == "/login"
+
+
+@pytest.mark.parametrize("username, password", [("Alice", "builder"), ("Mallory", "wonderland"), ("", "")])
+def test_wrong_password(client, username: str, password: str) -> None:
+    """Wrong passwords and unknown users are turned away alike"""
+    response = client.post("/login", data={"username": username, "password": password})
+    assert response.status_code == 401
+    assert "Wrong username or password" in response.get_data(as_text=True)
+
+
+def test_outdated_hashes_are_upgraded(security, client, monkeypatch) -> None:
+    """A hash made with fewer rounds is replaced on login"""
+    weak = CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__default_rounds=500).hash("builder")
+    monkeypatch.setitem(security.passwords, "Bob", weak)
+    client.post("/login", data={"username": "Bob", "password": "builder"})
+    assert security.passwords["Bob"].startswith("$pbkdf2-sha256$1000$")
+    client.post("/login", data={"username": "Bob", "password": "builder"})
+    assert security.passwords["Bob"].startswith("$pbkdf2-sha256$1000$")
+
+
+def test_login_attempts_are_limited(client) -> None:
+    """Guessing the password of an account is limited"""
+    for _ in range(5):
+        client.post("/login", data={"username": "Alice", "password": "guess"})
+    response = client.post("/login", data={"username": "Alice", "password": "wonderland"})
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    response = client.post("/login", data={"username": "Bob", "password": "builder"})
+    assert response.status_code == 302
+
+
+def test_hashing_is_bounded(monkeypatch) -> None:
+    """Hashes beyond the pool and its queue are rejected instead of waiting"""
+    service = HashingService(1000, workers=1, max_pending=0)
+    started, release = threading.Event(), threading.Event()
+    hash_password = service.context.hash
+
+    def slow_hash(password: str) -> str:
+        started.set()
+        release.wait(5)
+        return hash_password(password)
+
+    monkeypatch.setattr(service.context, "hash", slow_hash)
+    worker = threading.Thread(target=service.hash, args=("slow",))
+    worker.start()
+    assert started.wait(5)
+    with pytest.raises(HashingBusy):
+        service.hash("fast")
+    release.set()
+    worker.join()
+    assert service.verify("slow", None) == (False, None)
+    service.close()
+
+
+def test_secrets_are_required(security, monkeypatch, capsys) -> None:
+    """The app does not start without its secrets, and does not make any up"""
+    monkeypatch.delenv("SECRET_KEY")
+    monkeypatch.delenv("BOB_PASSWORD")
+    with pytest.raises(RuntimeError, match="SECRET_KEY, BOB_PASSWORD"):
+        load_app()
+    assert "wonderland" not in capsys.readouterr().err
+
+
+def test_nothing_is_hashed_on_import(security) -> None:
+    """Passwords are hashed on first use, not when the app is imported"""
+    module = load_app()
+    assert module.hasher is None
+    module.app.test_client().get("/login")
+    assert module.hasher is not None
+    module.hasher.close()
+
+
+def test_calibration() -> None:
+    """Calibrated costs grow with the target time"""
+    fast, slow = calibrate(20), calibrate(200)
+    assert 1_000 <= fast < slow
+    assert len(str(slow).rstrip("0")) <= 2
+
+
+if __name__ == "__main__":
+    pytest.main(["-v", __file__])